@@ -0,0 +1,79 @@
+"""Add task listing indexes and full-text search
+
+Revision ID: 0e9ef18e3f29
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases whose tasks table predates these indexes never got them from
+create_all, so listings fell back to LIKE and unindexed scans. Indexes that
+already exist are kept, and the SQLite full-text table is rebuilt from the
+tasks already stored.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e9ef18e3f29'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_tasks_created_by_id": ["created_by", "id"],
+    "ix_tasks_created_by_status_created_at": ["created_by", "status", "created_at"],
+}
+
+# Same external-content table and triggers as app/models/task.py creates on a fresh database
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts "
+    "USING fts5(title, description, content='tasks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    # Index the rows already in tasks
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    existing = {index["name"] for index in sa.inspect(bind).get_indexes("tasks")}
+
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "tasks", columns)
+
+    if bind.dialect.name == "mysql" and "ix_tasks_title_description_fulltext" not in existing:
+        op.create_index(
+            "ix_tasks_title_description_fulltext", "tasks", ["title", "description"],
+            mysql_prefix="FULLTEXT"
+        )
+    elif bind.dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tasks_fts")
+    elif bind.dialect.name == "mysql":
+        op.drop_index("ix_tasks_title_description_fulltext", table_name="tasks")
+
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name="tasks")
@@ -0,0 +1,51 @@
+"""Add task status counts
+
+Revision ID: 42b0472c6fb9
+Revises: 0e9ef18e3f29
+Create Date: 2026-10-18 09:10:00.000000
+
+The counters are filled from the tasks already stored, so /tasks/stats is
+right as soon as the upgrade finishes. A table that create_all already made
+is refilled the same way.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '42b0472c6fb9'
+down_revision: Union[str, Sequence[str], None] = '0e9ef18e3f29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ("PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+# On PostgreSQL the type already exists for tasks.status
+TASK_STATUS = sa.Enum(*STATUSES, name="taskstatus").with_variant(
+    postgresql.ENUM(*STATUSES, name="taskstatus", create_type=False), "postgresql"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "task_status_counts" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "task_status_counts",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("status", TASK_STATUS, nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("user_id", "status"),
+        )
+    op.execute("DELETE FROM task_status_counts")
+    op.execute(
+        "INSERT INTO task_status_counts (user_id, status, count) "
+        "SELECT created_by, status, COUNT(*) FROM tasks GROUP BY created_by, status"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("task_status_counts")
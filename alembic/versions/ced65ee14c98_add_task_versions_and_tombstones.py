@@ -0,0 +1,76 @@
+"""Add task versions and tombstones for incremental sync
+
+Revision ID: ced65ee14c98
+Revises: 42b0472c6fb9
+Create Date: 2026-10-18 09:20:00.000000
+
+Existing tasks get version = id, which is unique and increasing per owner;
+clients receive all of them in their first sync, so their relative order
+doesn't matter. Tables that create_all already made on startup are kept.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ced65ee14c98'
+down_revision: Union[str, Sequence[str], None] = '42b0472c6fb9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "version" not in {column["name"] for column in inspector.get_columns("tasks")}:
+        op.add_column(
+            "tasks", sa.Column("version", sa.BigInteger(), nullable=False, server_default="0")
+        )
+        op.execute("UPDATE tasks SET version = id")
+    if "ix_tasks_created_by_version" not in {index["name"] for index in inspector.get_indexes("tasks")}:
+        op.create_index("ix_tasks_created_by_version", "tasks", ["created_by", "version"])
+
+    if "task_version_counters" not in tables:
+        op.create_table(
+            "task_version_counters",
+            sa.Column("owner_id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.Column("pruned_through", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("owner_id"),
+        )
+    # One counter per user, continuing after their highest version
+    op.execute(
+        "INSERT INTO task_version_counters (owner_id, version, pruned_through) "
+        "SELECT users.id, COALESCE(MAX(tasks.version), 0), 0 "
+        "FROM users LEFT JOIN tasks ON tasks.created_by = users.id "
+        "WHERE users.id NOT IN (SELECT owner_id FROM task_version_counters) "
+        "GROUP BY users.id"
+    )
+
+    if "task_tombstones" not in tables:
+        op.create_table(
+            "task_tombstones",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("task_id", sa.Integer(), nullable=False),
+            sa.Column("owner_id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_task_tombstones_owner_id_version", "task_tombstones", ["owner_id", "version"])
+        op.create_index("ix_task_tombstones_deleted_at", "task_tombstones", ["deleted_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_task_tombstones_deleted_at", table_name="task_tombstones")
+    op.drop_index("ix_task_tombstones_owner_id_version", table_name="task_tombstones")
+    op.drop_table("task_tombstones")
+    op.drop_table("task_version_counters")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_index("ix_tasks_created_by_version")
+        batch_op.drop_column("version")
@@ -1,20 +1,28 @@
+import time
+from datetime import datetime
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, WebSocket, WebSocketException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..core.database import get_db, get_async_db
 from ..core.security import security
+from ..core.tracing import set_user, span
 from ..models.user import User, UserRole
-from ..services.user_service import user_service
+from ..models.task import TaskStatus
+from ..schemas.task import TaskFilter, TASK_SORT_PATTERN
+from ..services.user_service import user_service, async_user_service
 
 security_scheme = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_db),
+def get_token_payload(
     credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
-) -> User:
-    token = credentials.credentials
-    payload = security.verify_token(token)
+) -> dict:
+    """Claims of the presented (valid, unrevoked) access token"""
+    return security.verify_token(credentials.credentials)
+
+def _token_subject(payload: dict) -> str:
     username: str = payload.get("sub")
     
     if username is None:
@@ -23,8 +31,9 @@ def get_current_user(
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = user_service.get_user_by_username(db, username=username)
+    return username
+
+def _ensure_active(user: Optional[User]) -> User:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,12 +49,63 @@ def get_current_user(
     
     return user
 
+def _claims_user(payload: dict) -> Optional[User]:
+    """Caller rebuilt from embedded token claims while they are fresh enough to trust
+
+    Only id, username, role and is_active are set, which is all authorization
+    needs. A role change or deactivation shows up once the window has passed.
+    """
+    max_age = settings.token_claims_max_age_seconds
+    if max_age <= 0:
+        return None
+    
+    # Tokens issued without the claims (or with bad ones) take the lookup path
+    user_id, issued_at = payload.get("user_id"), payload.get("iat")
+    role, is_active = payload.get("role"), payload.get("is_active")
+    if not isinstance(user_id, int) or not isinstance(issued_at, (int, float)):
+        return None
+    if role not in UserRole._value2member_map_ or not isinstance(is_active, bool):
+        return None
+    if time.time() - issued_at > max_age:
+        return None
+    return User(
+        id=user_id,
+        username=_token_subject(payload),
+        role=UserRole(role),
+        is_active=is_active,
+    )
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
+) -> User:
+    with span("auth"):
+        username = _token_subject(security.verify_token(credentials.credentials))
+        user = _ensure_active(user_service.get_principal(db, username=username))
+    set_user(user.id)
+    return user
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     return current_user
 
 
+def get_authorized_user(
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
+) -> User:
+    """Like get_current_user, but may answer from token claims without a lookup"""
+    with span("auth"):
+        payload = security.verify_token(credentials.credentials)
+        user = _claims_user(payload)
+        if user is None:
+            user = user_service.get_principal(db, username=_token_subject(payload))
+        user = _ensure_active(user)
+    set_user(user.id)
+    return user
+
+
 def get_admin_user(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
@@ -54,4 +114,84 @@ def get_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_websocket_user(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+) -> User:
+    """get_authorized_user for WebSockets: bearer token from `?token=` or the Authorization header
+
+    Browsers can't set headers on WebSocket handshakes, hence the query parameter.
+    """
+    if token is None:
+        scheme, _, token = websocket.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            token = None
+    if not token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Not authenticated")
+    try:
+        return get_authorized_user(db, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=str(exc.detail))
+    finally:
+        # The socket may stay open for hours; don't hold a pooled connection that long
+        db.close()
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
+) -> User:
+    with span("auth"):
+        username = _token_subject(await security.verify_token_async(credentials.credentials))
+        user = _ensure_active(await async_user_service.get_principal(db, username=username))
+    set_user(user.id)
+    return user
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    return current_user
+
+
+async def get_authorized_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme)
+) -> User:
+    with span("auth"):
+        payload = await security.verify_token_async(credentials.credentials)
+        user = _claims_user(payload)
+        if user is None:
+            user = await async_user_service.get_principal(db, username=_token_subject(payload))
+        user = _ensure_active(user)
+    set_user(user.id)
+    return user
+
+
+async def get_admin_user_async(
+    current_user: User = Depends(get_current_active_user_async),
+) -> User:
+    return get_admin_user(current_user)
+
+
+def get_task_filters(
+    status: Optional[TaskStatus] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    updated_after: Optional[datetime] = Query(None),
+    updated_before: Optional[datetime] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    sort: str = Query("id", pattern=TASK_SORT_PATTERN),
+) -> TaskFilter:
+    return TaskFilter(
+        status=status,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        q=q,
+        sort=sort,
+    )
@@ -1,10 +1,50 @@
 from fastapi import APIRouter
+from ...core.config import settings
 from .auth import router as auth_router
 from .users import router as users_router
 from .tasks import router as tasks_router
+from .async_auth import router as async_auth_router
+from .async_users import router as async_users_router
+from .async_tasks import router as async_tasks_router
 
-api_router = APIRouter()
 
-api_router.include_router(auth_router, prefix="/auth", tags=["authentication"])
-api_router.include_router(users_router, prefix="/users", tags=["users"])
-api_router.include_router(tasks_router, prefix="/tasks", tags=["tasks"])
\ No newline at end of file
+def _with_fallback(primary: APIRouter, fallback: APIRouter) -> APIRouter:
+    """Serve `primary` routes, plus any `fallback` route it doesn't implement"""
+    implemented = {
+        (route.path, method)
+        for route in primary.routes
+        for method in getattr(route, "methods", None) or ()
+    }
+    router = APIRouter()
+    # Fallback-only routes go first so their static paths win over `/{id}` patterns
+    router.routes.extend(
+        route for route in fallback.routes
+        if not any((route.path, method) in implemented for method in getattr(route, "methods", None) or ())
+    )
+    router.routes.extend(primary.routes)
+    return router
+
+
+def create_api_router(use_async: bool = settings.async_database) -> APIRouter:
+    """Build the v1 API on the sync threadpool routes or the AsyncSession routes"""
+    api_router = APIRouter()
+    
+    if use_async:
+        api_router.include_router(
+            _with_fallback(async_auth_router, auth_router), prefix="/auth", tags=["authentication"]
+        )
+        api_router.include_router(
+            _with_fallback(async_users_router, users_router), prefix="/users", tags=["users"]
+        )
+        api_router.include_router(
+            _with_fallback(async_tasks_router, tasks_router), prefix="/tasks", tags=["tasks"]
+        )
+    else:
+        api_router.include_router(auth_router, prefix="/auth", tags=["authentication"])
+        api_router.include_router(users_router, prefix="/users", tags=["users"])
+        api_router.include_router(tasks_router, prefix="/tasks", tags=["tasks"])
+    
+    return api_router
+
+
+api_router = create_api_router()
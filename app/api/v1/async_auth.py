@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...core.database import get_async_db
+from ...core.tracing import TracedRoute
+from ...schemas.user import UserCreate, UserResponse, UserLogin, Token, RefreshRequest
+from ...services.auth_service import async_auth_service
+from ...services.user_service import async_user_service
+
+router = APIRouter(route_class=TracedRoute)
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(
+    user: UserCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Register a new user"""
+    return await async_user_service.create_user(db=db, user=user)
+
+
+@router.post("/login", response_model=Token)
+async def login(
+    login_data: UserLogin,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Login and get access token"""
+    return await async_auth_service.login(db=db, login_data=login_data)
+
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    payload: RefreshRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Exchange a refresh token for a new access/refresh token pair"""
+    return await async_auth_service.refresh(db=db, refresh_token=payload.refresh_token)
@@ -0,0 +1,188 @@
+from typing import Awaitable, Callable, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import Response
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...core.concurrency import call_blocking
+from ...core.database import get_async_db
+from ...core.tracing import TracedRoute
+from ...schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskFilter, TaskPage, TaskStats, TaskChanges
+from ...services.task_service import async_task_service, task_service
+from ...services.task_cache import task_cache, task_payload, listing_payload
+from ...models.user import User, UserRole
+from ...utils.http_cache import HttpCacheUtils
+from ...utils.pagination import CursorUtils
+from ..deps import get_task_filters, get_authorized_user_async
+
+router = APIRouter(route_class=TracedRoute)
+
+
+async def _cached_listing(
+    request: Request,
+    key: str,
+    load: Callable[[], Awaitable[List[Row]]],
+    limit: int,
+    cursor_mode: bool
+) -> Response:
+    payload = await call_blocking(task_cache.blocking, task_cache.get, key)
+    if payload is None:
+        payload = listing_payload(await load(), limit, cursor_mode)
+        await call_blocking(task_cache.blocking, task_cache.set, key, payload)
+    
+    return HttpCacheUtils.conditional_response(
+        request, payload.body, payload.etag, payload.last_modified
+    )
+
+@router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    task: TaskCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Create a new task"""
+    return await async_task_service.create_task(db=db, task=task, current_user=current_user)
+
+
+@router.get("/", response_model=Union[List[TaskResponse], TaskPage])
+async def read_tasks(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    filters: TaskFilter = Depends(get_task_filters),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Get tasks (user sees only their tasks, admin sees all)"""
+    cursor_mode = pagination == "cursor" or cursor is not None
+    after_id = CursorUtils.decode_id_cursor(cursor) if cursor else None
+    if cursor_mode:
+        skip = 0
+    
+    scope = task_cache.ALL if current_user.role == UserRole.ADMIN else current_user.id
+    key = await call_blocking(
+        task_cache.blocking, task_cache.listing_key,
+        scope, view="tasks", skip=skip, limit=limit, after=after_id, cursor=cursor_mode,
+        **filters.model_dump(mode="json")
+    )
+    return await _cached_listing(
+        request,
+        key,
+        lambda: async_task_service.get_tasks(
+            db, current_user, skip=skip, limit=limit, after_id=after_id,
+            filters=filters, keyset=cursor_mode, as_rows=True
+        ),
+        limit,
+        cursor_mode
+    )
+
+@router.get("/stats", response_model=TaskStats)
+async def read_task_stats(
+    user_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Task counts per status (user gets their own, admin gets global or any user's)"""
+    return await async_task_service.get_stats(db, current_user, user_id=user_id)
+
+@router.get("/changes", response_model=TaskChanges)
+async def read_task_changes(
+    since: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Tasks changed since a sync token (omit it for a snapshot); follow next_since"""
+    return await async_task_service.get_changes(db, current_user, since=since, limit=limit)
+
+@router.get("/{task_id}", response_model=TaskResponse)
+async def read_task(
+    request: Request,
+    task_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Get task by ID"""
+    scope = task_cache.ALL if current_user.role == UserRole.ADMIN else current_user.id
+    key = await call_blocking(task_cache.blocking, task_cache.task_key, scope, task_id)
+    payload = await call_blocking(task_cache.blocking, task_cache.get, key)
+    
+    if payload is None:
+        task = await async_task_service.get_task(db, task_id=task_id, current_user=current_user)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        payload = task_payload(task)
+        await call_blocking(task_cache.blocking, task_cache.set, key, payload)
+    
+    return HttpCacheUtils.conditional_response(
+        request, payload.body, payload.etag, payload.last_modified
+    )
+
+@router.put("/{task_id}", response_model=TaskResponse)
+async def update_task(
+    task_id: int,
+    task_update: TaskUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Update task by ID"""
+    updated_task = await async_task_service.update_task(db, task_id, task_update, current_user)
+    if not updated_task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return updated_task
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(
+    task_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Delete task by ID"""
+    if not await async_task_service.delete_task(db, task_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+@router.get("/user/{user_id}", response_model=Union[List[TaskResponse], TaskPage])
+async def read_user_tasks(
+    request: Request,
+    user_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    filters: TaskFilter = Depends(get_task_filters),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_authorized_user_async)
+):
+    """Get tasks for a specific user (admin can see any user, users can see only their own)"""
+    task_service.ensure_can_view_user_tasks(user_id, current_user)
+    
+    cursor_mode = pagination == "cursor" or cursor is not None
+    after_id = CursorUtils.decode_id_cursor(cursor) if cursor else None
+    if cursor_mode:
+        skip = 0
+    
+    key = await call_blocking(
+        task_cache.blocking, task_cache.listing_key,
+        user_id, view="user", skip=skip, limit=limit, after=after_id, cursor=cursor_mode,
+        **filters.model_dump(mode="json")
+    )
+    return await _cached_listing(
+        request,
+        key,
+        lambda: async_task_service.get_user_tasks(
+            db, user_id, current_user, skip=skip, limit=limit, after_id=after_id,
+            filters=filters, keyset=cursor_mode, as_rows=True
+        ),
+        limit,
+        cursor_mode
+    )
@@ -0,0 +1,88 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...core.database import get_async_db
+from ...core.tracing import TracedRoute
+from ...schemas.user import UserResponse, UserUpdate
+from ...services.user_service import async_user_service
+from ...models.user import User
+from ..deps import get_current_active_user_async, get_admin_user_async
+
+router = APIRouter(route_class=TracedRoute)
+
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(
+    current_user: User = Depends(get_current_active_user_async)
+):
+    """Get current user information"""
+    return current_user
+
+
+@router.put("/me", response_model=UserResponse)
+async def update_current_user(
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    """Update current user information"""
+    updated_user = await async_user_service.update_user(db, current_user.id, user_update)
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return updated_user
+
+@router.get("/", response_model=List[UserResponse])
+async def read_users(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
+):
+    """Get all users (admin only)"""
+    return await async_user_service.get_users(db, skip=skip, limit=limit)
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def read_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
+):
+    """Get user by ID (admin only)"""
+    user = await async_user_service.get_user(db, user_id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+@router.put("/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int,
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
+):
+    """Update user by ID (admin only)"""
+    updated_user = await async_user_service.update_user(db, user_id, user_update)
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return updated_user
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: User = Depends(get_admin_user_async)
+):
+    """Delete user by ID (admin only)"""
+    if not await async_user_service.delete_user(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
@@ -1,11 +1,14 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from ...core.database import get_db
-from ...schemas.user import UserCreate, UserResponse, UserLogin, Token
+from ...core.tracing import TracedRoute
+from ...schemas.user import UserCreate, UserResponse, UserLogin, Token, RefreshRequest, LogoutRequest
 from ...services.auth_service import auth_service
 from ...services.user_service import user_service
+from ..deps import get_token_payload
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(
@@ -22,4 +25,25 @@ def login(
     db: Session = Depends(get_db)
 ):
     """Login and get access token"""
-    return auth_service.login(db=db, login_data=login_data)
\ No newline at end of file
+    return auth_service.login(db=db, login_data=login_data)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access/refresh token pair
+
+    Each refresh token can be used once; reusing it is rejected.
+    """
+    return auth_service.refresh(db=db, refresh_token=payload.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    payload: Optional[LogoutRequest] = None,
+    token_payload: dict = Depends(get_token_payload)
+):
+    """Revoke the current access token (and the given refresh token)"""
+    auth_service.logout(token_payload, payload.refresh_token if payload else None)
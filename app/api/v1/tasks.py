@@ -1,55 +1,280 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Sequence, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, status, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
+from ...core.config import settings
 from ...core.database import get_db
-from ...schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskWithUser
-from ...services.task_service import task_service
-from ...models.user import User
-from ..deps import get_current_active_user
+from ...core.tracing import TracedRoute
+from ...schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskFilter, TaskWithUser, TaskPage, TaskStats,
+    TaskChanges, TaskBulkCreate, TaskBulkUpdate, TaskBulkDelete, TaskBulkResponse
+)
+from ...services.task_service import task_service, EXPORT_COLUMNS
+from ...services.task_cache import task_cache, task_payload, listing_payload
+from ...services.task_events import task_events, Subscription
+from ...models.user import User, UserRole
+from ...utils.http_cache import HttpCacheUtils
+from ...utils.pagination import CursorUtils
+from ..deps import get_task_filters, get_authorized_user, get_websocket_user
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
+
+
+def _cached_listing(
+    request: Request,
+    key: str,
+    load: Callable[[], List[Row]],
+    limit: int,
+    cursor_mode: bool
+) -> Response:
+    payload = task_cache.get(key)
+    if payload is None:
+        payload = listing_payload(load(), limit, cursor_mode)
+        task_cache.set(key, payload)
+    
+    return HttpCacheUtils.conditional_response(
+        request, payload.body, payload.etag, payload.last_modified
+    )
+
+def _export_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+def _ndjson_chunks(batches: Iterator[Sequence]) -> Iterator[str]:
+    names = [column.key for column in EXPORT_COLUMNS]
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, map(_export_value, row)))) + "\n" for row in batch
+        )
+
+def _csv_chunks(batches: Iterator[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in EXPORT_COLUMNS])
+    for batch in batches:
+        writer.writerows([_export_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def _sse_chunks(subscription: Subscription) -> AsyncIterator[str]:
+    try:
+        while True:
+            event = await subscription.get(timeout=settings.task_events_heartbeat_seconds)
+            if event is None:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            else:
+                yield f"id: {event.id}\nevent: {event.type}\ndata: {event.to_json()}\n\n"
+    finally:
+        subscription.close()
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(
     task: TaskCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
     """Create a new task"""
     return task_service.create_task(db=db, task=task, current_user=current_user)
 
 
-@router.get("/", response_model=List[TaskResponse])
+@router.post("/bulk", response_model=TaskBulkResponse, status_code=status.HTTP_201_CREATED)
+def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Create many tasks in a single transaction"""
+    results = task_service.bulk_create_tasks(db, payload.items, current_user)
+    return TaskBulkResponse(results=results)
+
+@router.patch("/bulk", response_model=TaskBulkResponse)
+def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Update many tasks in a single transaction (per-item results)"""
+    results = task_service.bulk_update_tasks(db, payload.items, current_user)
+    return TaskBulkResponse(results=results)
+
+@router.delete("/bulk", response_model=TaskBulkResponse)
+def bulk_delete_tasks(
+    payload: TaskBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Delete many tasks in a single transaction (per-item results)"""
+    results = task_service.bulk_delete_tasks(db, payload.ids, current_user)
+    return TaskBulkResponse(results=results)
+
+
+@router.get("/", response_model=Union[List[TaskResponse], TaskPage])
 def read_tasks(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    filters: TaskFilter = Depends(get_task_filters),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
-    """Get tasks (user sees only their tasks, admin sees all)"""
-    return task_service.get_tasks(db, current_user, skip=skip, limit=limit)
+    """Get tasks (user sees only their tasks, admin sees all)
+
+    Passing `pagination=cursor` (or any `cursor`) switches to keyset pagination
+    and returns a page envelope with `next_cursor`.
+    """
+    cursor_mode = pagination == "cursor" or cursor is not None
+    after_id = CursorUtils.decode_id_cursor(cursor) if cursor else None
+    if cursor_mode:
+        skip = 0
+    
+    scope = task_cache.ALL if current_user.role == UserRole.ADMIN else current_user.id
+    key = task_cache.listing_key(
+        scope, view="tasks", skip=skip, limit=limit, after=after_id, cursor=cursor_mode,
+        **filters.model_dump(mode="json")
+    )
+    return _cached_listing(
+        request,
+        key,
+        lambda: task_service.get_tasks(
+            db, current_user, skip=skip, limit=limit, after_id=after_id,
+            filters=filters, keyset=cursor_mode, as_rows=True
+        ),
+        limit,
+        cursor_mode
+    )
+
+@router.get("/export")
+def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Stream tasks as NDJSON or CSV (user exports their tasks, admin exports all)"""
+    batches = task_service.iter_export_batches(db, current_user)
+    if format == "csv":
+        chunks, media_type = _csv_chunks(batches), "text/csv"
+    else:
+        chunks, media_type = _ndjson_chunks(batches), "application/x-ndjson"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    )
+
+@router.get("/stats", response_model=TaskStats)
+def read_task_stats(
+    user_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Task counts per status (user gets their own, admin gets global or any user's)"""
+    return task_service.get_stats(db, current_user, user_id=user_id)
+
+@router.get("/changes", response_model=TaskChanges)
+def read_task_changes(
+    since: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Tasks changed since a sync token (omit it for a snapshot); follow next_since"""
+    return task_service.get_changes(db, current_user, since=since, limit=limit)
+
+@router.get("/events")
+async def stream_task_events(
+    last_event_id: Optional[int] = Header(None),
+    resume_after: Optional[int] = Query(None, alias="last_event_id"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_authorized_user)
+):
+    """Server-Sent Events for changes to tasks the user can see (admin sees all)
+
+    Reconnecting clients resume after the `Last-Event-ID` header (or the
+    `last_event_id` parameter); a `reset` event means the missed changes are
+    gone and the listing should be refetched.
+    """
+    # The stream outlives the request: release the session used to authorize it
+    db.close()
+    subscription = task_events.subscribe(
+        current_user, resume_after if resume_after is not None else last_event_id
+    )
+    return StreamingResponse(
+        _sse_chunks(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/events/ws")
+async def task_events_socket(
+    websocket: WebSocket,
+    last_event_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_websocket_user)
+):
+    """The task event stream as JSON messages over a WebSocket"""
+    await websocket.accept()
+    subscription = task_events.subscribe(current_user, last_event_id)
+    
+    async def forward():
+        while True:
+            event = await subscription.get()
+            await websocket.send_text(event.to_json())
+    
+    sender = asyncio.create_task(forward())
+    try:
+        # Nothing is expected from the client; this only waits for it to leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        subscription.close()
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def read_task(
+    request: Request,
     task_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
     """Get task by ID"""
-    task = task_service.get_task(db, task_id=task_id, current_user=current_user)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    return task
+    # Keyed per scope: a user's entries only ever hold tasks they may read
+    scope = task_cache.ALL if current_user.role == UserRole.ADMIN else current_user.id
+    key = task_cache.task_key(scope, task_id)
+    payload = task_cache.get(key)
+    
+    if payload is None:
+        task = task_service.get_task(db, task_id=task_id, current_user=current_user)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        payload = task_payload(task)
+        task_cache.set(key, payload)
+    
+    return HttpCacheUtils.conditional_response(
+        request, payload.body, payload.etag, payload.last_modified
+    )
 
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: int,
     task_update: TaskUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
     """Update task by ID"""
     updated_task = task_service.update_task(db, task_id, task_update, current_user)
@@ -64,7 +289,7 @@ def update_task(
 def delete_task(
     task_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
     """Delete task by ID"""
     if not task_service.delete_task(db, task_id, current_user):
@@ -73,13 +298,37 @@ def delete_task(
             detail="Task not found"
         )
 
-@router.get("/user/{user_id}", response_model=List[TaskResponse])
+@router.get("/user/{user_id}", response_model=Union[List[TaskResponse], TaskPage])
 def read_user_tasks(
+    request: Request,
     user_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    filters: TaskFilter = Depends(get_task_filters),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_authorized_user)
 ):
     """Get tasks for a specific user (admin can see any user, users can see only their own)"""
-    return task_service.get_user_tasks(db, user_id, current_user, skip=skip, limit=limit)
\ No newline at end of file
+    task_service.ensure_can_view_user_tasks(user_id, current_user)
+    
+    cursor_mode = pagination == "cursor" or cursor is not None
+    after_id = CursorUtils.decode_id_cursor(cursor) if cursor else None
+    if cursor_mode:
+        skip = 0
+    
+    key = task_cache.listing_key(
+        user_id, view="user", skip=skip, limit=limit, after=after_id, cursor=cursor_mode,
+        **filters.model_dump(mode="json")
+    )
+    return _cached_listing(
+        request,
+        key,
+        lambda: task_service.get_user_tasks(
+            db, user_id, current_user, skip=skip, limit=limit, after_id=after_id,
+            filters=filters, keyset=cursor_mode, as_rows=True
+        ),
+        limit,
+        cursor_mode
+    )
@@ -2,12 +2,13 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from ...core.database import get_db
+from ...core.tracing import TracedRoute
 from ...schemas.user import UserResponse, UserUpdate
 from ...services.user_service import user_service
 from ...models.user import User
 from ..deps import get_current_active_user, get_admin_user
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.get("/me", response_model=UserResponse)
 def read_current_user(
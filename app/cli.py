@@ -0,0 +1,58 @@
+"""Maintenance commands, e.g. `python -m app.cli rebuild-task-stats`"""
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from .core.config import settings
+from .core.database import Base, SessionLocal, engine
+from .services.task_stats import task_stats
+from .services.task_sync import task_sync
+
+
+def rebuild_task_stats(args: argparse.Namespace) -> int:
+    # Databases created before the counters existed need the table first
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rows = task_stats.rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt task status counters ({rows} rows)")
+    return 0
+
+
+def prune_task_tombstones(args: argparse.Namespace) -> int:
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        rows = task_sync.prune_tombstones(db, cutoff)
+    finally:
+        db.close()
+    print(f"Pruned {rows} task tombstones older than {args.older_than_days} days")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-task-stats", help="Recompute task status counters from the tasks table"
+    )
+    rebuild.set_defaults(handler=rebuild_task_stats)
+
+    prune = commands.add_parser(
+        "prune-task-tombstones", help="Forget old task deletions kept for GET /tasks/changes"
+    )
+    prune.add_argument(
+        "--older-than-days", type=int, default=settings.task_tombstone_retention_days
+    )
+    prune.set_defaults(handler=prune_task_tombstones)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,243 @@
-from functools import lru_cache
-from typing import Optional, Any
-import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional, Any, Callable, Dict
 import hashlib
+import json
+import threading
+import time
+from .config import settings
+from .metrics import registry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+# Indirection so tests can drive expiry without sleeping
+_now = time.monotonic
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Interface shared by all cache backends"""
+
+    # True when calls wait on the network; async callers then go through call_blocking
+    blocking = False
 
-class SimpleCache:
     def __init__(self):
-        self._cache = {}
-    
-    def get(self, key: str) -> Optional[Any]:
-        return self._cache.get(key)
-    
-    def set(self, key: str, value: Any, ttl: int = 300) -> None:
-        self._cache[key] = value
-    
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, max_size: int = 1024, default_ttl: int = 300):
+        super().__init__()
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= _now():
+                del self._cache[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = _now() + ttl if ttl > 0 else None
+        with self._lock:
+            self._cache[key] = (value, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _json_loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared between workers, backed by any Redis-protocol server
+
+    Values are stored as JSON, never as pickles: anything readable from the
+    server can't run code here. Callers convert richer objects to JSON types
+    themselves (tuples come back as lists).
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        namespace: str = "cache",
+        default_ttl: int = 300,
+        client: Any = None
+    ):
+        super().__init__()
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for the redis cache backend")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._prefix = f"{namespace}:"
+        self.default_ttl = default_ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self._client.get(self._prefix + key)
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return _json_loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._client.set(self._prefix + key, _json_dumps(value), ex=ttl if ttl > 0 else None)
+
     def delete(self, key: str) -> None:
-        self._cache.pop(key, None)
-    
+        self._client.delete(self._prefix + key)
+
     def clear(self) -> None:
-        self._cache.clear()
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+# Caches reported on /metrics, by namespace
+caches: Dict[str, CacheBackend] = {}
+
+
+def _cache_samples(stat: str):
+    return [({"cache": namespace}, backend.stats()[stat]) for namespace, backend in caches.items()]
+
+
+for _stat, _kind, _help in (
+    ("hits", "counter", "Cache lookups that found a live entry"),
+    ("misses", "counter", "Cache lookups that found nothing or an expired entry"),
+    ("evictions", "counter", "Entries dropped to stay within the size limit"),
+    ("hit_ratio", "gauge", "Hits over lookups since start"),
+):
+    registry.register_collector(
+        f"cache_{_stat}" + ("_total" if _kind == "counter" else ""),
+        _kind,
+        _help,
+        lambda stat=_stat: _cache_samples(stat)
+    )
+
+
+def create_cache(namespace: str, max_size: int, default_ttl: int) -> CacheBackend:
+    """Build a cache for the backend selected in settings"""
+    if settings.cache_backend == "memory":
+        backend = MemoryCache(max_size=max_size, default_ttl=default_ttl)
+    elif settings.cache_backend == "redis":
+        backend = RedisCache(url=settings.cache_url, namespace=namespace, default_ttl=default_ttl)
+    else:
+        raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+    caches[namespace] = backend
+    return backend
 
-cache = SimpleCache()
 
 def cache_key(*args, **kwargs) -> str:
     """Generate cache key from arguments"""
-    key_data = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True)
-    return hashlib.md5(key_data.encode()).hexdigest()
\ No newline at end of file
+    key_data = json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=str)
+    return hashlib.md5(key_data.encode()).hexdigest()
+
+
+def cached(ttl: Optional[int] = None, key_prefix: Optional[str] = None):
+    """Memoize a function's result in the application cache"""
+    def decorator(func: Callable) -> Callable:
+        prefix = key_prefix or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = f"{prefix}:{cache_key(*args, **kwargs)}"
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.set(key, value, ttl=ttl)
+            return value
+
+        return wrapper
+    return decorator
+
+
+cache = create_cache(
+    namespace="cache",
+    max_size=settings.cache_max_size,
+    default_ttl=settings.cache_default_ttl
+)
+
+# Resolved authentication principals keyed by token subject
+principal_cache = create_cache(
+    namespace="principal",
+    max_size=settings.principal_cache_max_size,
+    default_ttl=settings.principal_cache_ttl_seconds
+)
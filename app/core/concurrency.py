@@ -0,0 +1,13 @@
+from typing import Any, Callable
+from fastapi.concurrency import run_in_threadpool
+
+
+async def call_blocking(blocking: bool, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call `fn` from async code, in the threadpool when it may wait on the network
+
+    Backends set `blocking` when their calls are Redis round trips; in-memory
+    ones are called inline, which is cheaper than a thread hop.
+    """
+    if blocking:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -8,9 +8,104 @@ class Settings(BaseSettings):
     description: str = "A comprehensive task management API with JWT authentication"
     
     database_url: str
+    # Serve the API through AsyncSession-backed routes instead of the threadpool
+    async_database: bool = False
+    async_database_url: Optional[str] = None
+    # Read replicas for lag-tolerant reads (listings, lookups); async URLs are derived
+    database_replica_urls: List[str] = []
+    # How long a replica that lost its connection is skipped
+    replica_eject_seconds: float = 30.0
+    # Queue pool sizing (ignored by pools that don't queue, e.g. SQLite in-memory)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 300
+    db_pool_pre_ping: bool = True
+    # Applied to every new SQLite connection; an empty value keeps SQLite's default
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268435456
+    sqlite_busy_timeout_ms: int = 5000
+    # /health/ready reports 503 at this pool saturation, before requests queue for connections
+    health_ready_max_pool_saturation: float = 0.9
+    health_ready_timeout_seconds: float = 2.0
     secret_key: str
     algorithm: str = "HS256"
+    # RS256/RS384/RS512/ES256/ES384/ES512 sign with a private key (PEM) instead of
+    # secret_key, and publish the public key at /.well-known/jwks.json
+    jwt_private_key: Optional[str] = None
+    jwt_private_key_file: Optional[str] = None
+    # Sent as the token's `kid` header; defaults to the public key's RFC 7638 thumbprint
+    jwt_key_id: Optional[str] = None
+    # Retired keys (kid -> public PEM, or secret for HS*) still accepted while tokens they signed live
+    jwt_verification_keys: Dict[str, str] = {}
+    jwks_max_age_seconds: int = 300
     access_token_expire_minutes: int = 30
+    # Refresh tokens mint new access tokens without the password (one use each)
+    refresh_token_expire_days: int = 7
+    # Revoked token ids: "memory" (per process) or "redis" (shared between workers)
+    token_denylist_backend: str = "memory"
+    token_denylist_url: Optional[str] = None
+    token_denylist_bucket_seconds: int = 60
+    # Token types still accepted while the denylist is unreachable; the rest get a 503
+    token_denylist_fail_open: List[str] = ["access"]
+    # Verified tokens are cached until they expire, so a reused token skips the signature check
+    token_cache_max_size: int = 10000
+    # Access tokens carry user_id/role/is_active; task routes trust them for this long
+    # after issue instead of loading the user (0 always loads the user)
+    token_claims_max_age_seconds: int = 0
+    
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 32
+    
+    # "memory" keeps entries per process; "redis" shares them between workers
+    cache_backend: str = "memory"
+    cache_url: Optional[str] = None
+    cache_max_size: int = 10000
+    cache_default_ttl: int = 300
+    
+    task_cache_ttl_seconds: int = 60
+    
+    # Task change events (GET /tasks/events, /tasks/events/ws): "memory" (per process) or
+    # "redis" (pub/sub between workers). The history is what reconnecting clients can resume from
+    task_events_backend: str = "memory"
+    task_events_url: Optional[str] = None
+    task_events_history_size: int = 1000
+    task_events_queue_size: int = 256
+    task_events_heartbeat_seconds: int = 15
+    # Deletions are kept this long for GET /tasks/changes (`python -m app.cli prune-task-tombstones`);
+    # sync tokens older than what was pruned have to start over
+    task_tombstone_retention_days: int = 30
+    
+    principal_cache_ttl_seconds: int = 30
+    principal_cache_max_size: int = 10000
+    
+    # Bloom filter over taken usernames + emails (two entries per user); registrations
+    # of names it has never seen skip the duplicate probe. Rebuilt twice as big when full
+    identity_filter_capacity: int = 200000
+    identity_filter_error_rate: float = 0.01
+    
+    # Limits are "<requests>/<seconds>"; "redis" shares buckets between workers
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_url: Optional[str] = None
+    rate_limit_default: str = "100/60"
+    rate_limit_user: str = "300/60"
+    rate_limit_routes: Dict[str, str] = {
+        "POST /api/v1/auth/login": "10/60",
+        "POST /api/v1/auth/register": "10/60",
+    }
+    rate_limit_exempt_paths: List[str] = ["/health", "/health/ready", "/metrics"]
+    rate_limit_max_keys: int = 100000
+    
+    log_level: str = "INFO"
+    # Records waiting for the background log writer; beyond 75% of this, only
+    # one in log_sample_every records below WARNING is kept
+    log_queue_size: int = 10000
+    log_sample_every: int = 10
+    # Statements slower than this are logged with their SQL; 0 disables the log
+    slow_query_threshold_ms: float = 200.0
     
     class Config:
         env_file = ".env"
@@ -1,22 +1,373 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from .config import settings
+from .metrics import DB_POOL_CHECKOUT_WAIT, DB_QUERY_DURATION, current_query_stats, registry
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=False
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# Indirection so tests can drive the clock without sleeping
+_now = time.monotonic
+
+# Longest SQL text kept in a slow query record
+SLOW_QUERY_SQL_LIMIT = 2000
+
+
+class _CheckoutTimingMixin:
+    """Records how long each checkout waited for a connection (mixed into queue pools)"""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_INSTRUMENTED_POOLS = {
+    QueuePool: InstrumentedQueuePool,
+    AsyncAdaptedQueuePool: InstrumentedAsyncAdaptedQueuePool,
+}
+
+
+def _pool_options(database_url: str, metrics_name: str) -> Dict[str, Any]:
+    """Pool settings, with the dialect's default queue pool swapped for its instrumented subclass
+
+    Other pools (e.g. SQLite in-memory) keep their defaults and take no sizing.
+    """
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    url = make_url(database_url)
+    pool_class = _INSTRUMENTED_POOLS.get(url.get_dialect().get_pool_class(url))
+    if pool_class is None:
+        return options
+    return {
+        **options,
+        "poolclass": type(pool_class.__name__, (pool_class,), {"metrics_name": metrics_name}),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_journal_mode:
+            # Readers no longer block the writer (and vice versa)
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        if settings.sqlite_synchronous:
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def create_app_engine(database_url: str, metrics_name: str = "default", **kwargs: Any) -> Engine:
+    """Engine with the configured pool, SQLite tuning and query instrumentation"""
+    url = make_url(database_url)
+    if url.get_dialect().is_async:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_engine = create_async_engine(
+            database_url, echo=False, **{**_pool_options(database_url, metrics_name), **kwargs}
+        )
+        sync_engine = async_engine.sync_engine
+    else:
+        async_engine = None
+        sync_engine = create_engine(
+            database_url, echo=False, **{**_pool_options(database_url, metrics_name), **kwargs}
+        )
+    
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _sqlite_pragmas)
+    instrument_engine(sync_engine)
+    return async_engine or sync_engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe bound parameters without their values (which may be secrets)"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else ()
+        return f"{len(parameters)} x {parameters_shape(first)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(sorted(str(key) for key in parameters)) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return f"({len(parameters)} positional)"
+    return "none" if parameters is None else type(parameters).__name__
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    
+    threshold = settings.slow_query_threshold_ms
+    if threshold > 0 and elapsed * 1000 >= threshold:
+        slow_query_logger.warning(
+            "Slow query (%.1f ms)", elapsed * 1000,
+            extra={"fields": {
+                "duration_ms": round(elapsed * 1000, 2),
+                "sql": statement[:SLOW_QUERY_SQL_LIMIT],
+                "parameters": parameters_shape(parameters, executemany),
+            }}
+        )
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    connection = context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Time every statement and attribute it to the current request"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping any that failed recently
+
+    A replica whose connection breaks is ejected for `eject_seconds`; after that
+    live traffic tries it again, and a replica that is still down is ejected anew.
+    """
+
+    def __init__(self, engines: Dict[str, Engine], eject_seconds: float = 30.0):
+        # Sync engines: what Session.get_bind has to return, even for AsyncSession
+        self.engines = {name: getattr(engine, "sync_engine", engine) for name, engine in engines.items()}
+        self.eject_seconds = eject_seconds
+        self._names = list(self.engines)
+        self._ejected_until: Dict[str, float] = {}
+        self._turn = itertools.count()
+        for name, sync_engine in self.engines.items():
+            event.listen(sync_engine, "handle_error", self._on_error(name))
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Optional[Engine]:
+        """Next healthy replica, or None when all of them are ejected"""
+        if not self._names:
+            return None
+        now = _now()
+        start = next(self._turn)
+        for offset in range(len(self._names)):
+            name = self._names[(start + offset) % len(self._names)]
+            if self._ejected_until.get(name, 0.0) <= now:
+                return self.engines[name]
+        return None
+
+    def eject(self, name: str) -> None:
+        self._ejected_until[name] = _now() + self.eject_seconds
+        logger.warning(f"Read replica {name} ejected for {self.eject_seconds:g}s")
+
+    def is_ejected(self, name: str) -> bool:
+        return self._ejected_until.get(name, 0.0) > _now()
+
+    def _on_error(self, name: str):
+        def handle_error(context) -> None:
+            # Lost or refused connections, not e.g. a bad statement
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                self.eject(name)
+        return handle_error
+
+
+# bind_arguments for reads that tolerate replication lag
+REPLICA_READ = {"replica": True}
+
+
+class RoutingSession(Session):
+    """Session that serves opted-in reads from a replica
+
+    Reads pass bind_arguments=REPLICA_READ. Everything else goes to the primary,
+    and so does every read once the session has written, so a request always
+    sees its own writes.
+    """
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw: Any):
+        if clause is not None and getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+        elif replica and self.replicas and not self.info.get("wrote"):
+            replica_engine = self.replicas.choose()
+            if replica_engine is not None:
+                return replica_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+engine = create_app_engine(settings.database_url, "default")
+
+replicas = ReplicaSet(
+    {
+        f"replica{index}": create_app_engine(url, f"replica{index}")
+        for index, url in enumerate(settings.database_replica_urls)
+    },
+    eject_seconds=settings.replica_eject_seconds,
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas
+)
 Base = declarative_base()
 
+# Async drivers used when ASYNC_DATABASE_URL is not given explicitly
+# (asyncpg is not in requirements.txt; install it to run PostgreSQL async)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Swap the sync DBAPI driver of a URL for its asyncio counterpart"""
+    url = make_url(database_url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    return url.render_as_string(hide_password=False)
+
+
+async_engine = None
+async_replicas = ReplicaSet({})
+AsyncSessionLocal = None
+
+if settings.async_database:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_app_engine(
+        settings.async_database_url or to_async_url(settings.database_url), "async"
+    )
+    async_replicas = ReplicaSet(
+        {
+            f"replica{index}": create_app_engine(to_async_url(url), f"async_replica{index}")
+            for index, url in enumerate(settings.database_replica_urls)
+        },
+        eject_seconds=settings.replica_eject_seconds,
+    )
+    # Expired attributes can't be lazily reloaded outside the event loop's IO
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        replicas=async_replicas,
+    )
+
+
+def supports_returning(db, statement: str) -> bool:
+    """Whether the primary supports "insert" or "update" ... RETURNING
+
+    SQLite 3.35+ and PostgreSQL do both; MariaDB only INSERT; MySQL neither.
+    """
+    return getattr(db.get_bind().dialect, f"{statement}_returning")
+
+
+def commit_loaded(db: Session, instance: Any) -> None:
+    """Commit without the refresh SELECT, for an instance RETURNING already loaded
+
+    Commit expires everything in the session; a detached instance keeps its state.
+    """
+    db.expunge(instance)
+    db.commit()
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled (set ASYNC_DATABASE=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_status(sync_engine: Engine) -> Dict[str, Any]:
+    """Connections in use against the pool's capacity (queue pools only)"""
+    pool = sync_engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        status.update(
+            size=pool.size(),
+            checked_out=checked_out,
+            overflow=max(pool.overflow(), 0),
+            capacity=capacity,
+            saturation=round(checked_out / capacity, 3) if capacity else 0.0,
+        )
+    return status
+
+
+def ping(sync_engine: Engine) -> float:
+    """Round-trip a trivial statement; returns seconds"""
+    started = time.perf_counter()
+    with sync_engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+    return time.perf_counter() - started
+
+
+async def ping_async(engine) -> float:
+    started = time.perf_counter()
+    async with engine.connect() as connection:
+        await connection.exec_driver_sql("SELECT 1")
+    return time.perf_counter() - started
+
+
+def _ejected_replicas():
+    return [
+        ({"replica": name, "engine": kind}, 1 if replica_set.is_ejected(name) else 0)
+        for kind, replica_set in (("sync", replicas), ("async", async_replicas))
+        for name in replica_set.engines
+    ]
+
+
+registry.register_collector(
+    "db_replica_ejected", "gauge", "1 while a read replica is ejected after a connection failure",
+    _ejected_replicas
+)
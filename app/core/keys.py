@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from .config import settings
+
+SYMMETRIC_ALGORITHMS = ("HS256", "HS384", "HS512")
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+# Members that identify a public key, per RFC 7638
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def _thumbprint(public_jwk: Dict[str, Any]) -> str:
+    members = {name: public_jwk[name] for name in _THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+class KeyRing:
+    """The key tokens are signed with plus every key still accepted for verification
+
+    Keys are parsed once here rather than on each encode/decode. Tokens name
+    their key in the `kid` header; tokens without one (issued before key ids)
+    are checked against the signing key. For asymmetric algorithms the public
+    halves are published as a JWK set so other services can verify offline.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: str,
+        kid: Optional[str] = None,
+        verification_keys: Optional[Dict[str, str]] = None
+    ):
+        if algorithm not in SYMMETRIC_ALGORITHMS + ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported token algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.symmetric = algorithm in SYMMETRIC_ALGORITHMS
+        self._signing: Key = jwk.construct(signing_key, algorithm)
+        public = self._signing if self.symmetric else self._signing.public_key()
+        if kid is None and not self.symmetric:
+            kid = _thumbprint(public.to_dict())
+        self.kid = kid
+        self._verifiers: Dict[Optional[str], Key] = {kid: public}
+        for retired_kid, key_data in (verification_keys or {}).items():
+            key = jwk.construct(key_data, algorithm)
+            # Only ever keep (and publish) the public half of a retired key pair
+            self._verifiers[retired_kid] = key if self.symmetric else key.public_key()
+        self._jwks: Optional[Tuple[bytes, str]] = None
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        headers = {"kid": self.kid} if self.kid is not None else None
+        return jwt.encode(claims, self._signing, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Decode a token, raising JWTError when it is invalid or its key is unknown"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verifiers.get(kid) if kid is not None else self._verifiers[self.kid]
+        if key is None:
+            raise JWTError("Unknown key id")
+        # Pinned to our algorithm, so a token can't pick a weaker one
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> Tuple[bytes, str]:
+        """Public verification keys as a JWK set: (body, etag). Empty for HMAC secrets"""
+        if self._jwks is None:
+            keys = []
+            if not self.symmetric:
+                for kid, key in self._verifiers.items():
+                    keys.append({**key.to_dict(), "kid": kid, "use": "sig", "alg": self.algorithm})
+            body = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+            self._jwks = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+        return self._jwks
+
+
+def create_key_ring() -> KeyRing:
+    """Build the key ring for the algorithm and keys selected in settings"""
+    if settings.algorithm in SYMMETRIC_ALGORITHMS:
+        signing_key = settings.secret_key
+    else:
+        signing_key = settings.jwt_private_key
+        if signing_key is None and settings.jwt_private_key_file:
+            with open(settings.jwt_private_key_file) as key_file:
+                signing_key = key_file.read()
+        if not signing_key:
+            raise ValueError(f"{settings.algorithm} needs JWT_PRIVATE_KEY or JWT_PRIVATE_KEY_FILE")
+    return KeyRing(
+        settings.algorithm,
+        signing_key,
+        kid=settings.jwt_key_id,
+        verification_keys=settings.jwt_verification_keys
+    )
+
+
+key_ring = create_key_ring()
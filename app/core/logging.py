@@ -1,38 +1,195 @@
+import atexit
+import copy
 import logging
+import os
+import queue
+import socket
 import sys
-from datetime import datetime
-from typing import Any, Dict
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 import json
+from .config import settings
+from .metrics import registry
+from .tracing import RequestContextFilter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str)
+
 
 class CustomFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__()
+        # Identical on every record, so built once
+        self.static_fields = {
+            "service": settings.project_name,
+            "version": settings.version,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+        }
+        self._second = None
+        self._second_text = ""
+
+    def _timestamp(self, created: float) -> str:
+        # strftime only once per second; records are stamped when created, not when written
+        second = int(created)
+        if second != self._second:
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = second
+        return f"{self._second_text}.{int((created - second) * 1e6):06d}"
+
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
+            "logger": record.name,
             "message": record.getMessage(),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
+            **self.static_fields,
         }
-        
+
         if hasattr(record, 'user_id'):
             log_entry["user_id"] = record.user_id
-        
+
         if hasattr(record, 'request_id'):
             log_entry["request_id"] = record.request_id
-        
-        return json.dumps(log_entry)
-    
+
+        # Structured payload passed as extra={"fields": {...}}
+        fields = getattr(record, "fields", None)
+        if fields:
+            log_entry.update(fields)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_entry["exception"] = record.exc_text
+
+        return _dumps(log_entry)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to a background writer without ever blocking the caller
+
+    Once the queue is `high_watermark` full, only one in `sample_every` records
+    below WARNING is kept; when it is completely full, records are dropped.
+    Both are counted per level rather than silently lost.
+    """
+
+    def __init__(self, log_queue: queue.Queue, sample_every: int = 10, high_watermark: float = 0.75):
+        super().__init__(log_queue)
+        self.capacity = log_queue.maxsize
+        self.sample_every = max(1, sample_every)
+        self.high_mark = int(self.capacity * high_watermark) if self.capacity > 0 else 0
+        self.dropped: Dict[str, int] = {}
+        self.sampled: Dict[str, int] = {}
+        self._seen = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counts: Dict[str, int], record: logging.LogRecord) -> None:
+        with self._lock:
+            counts[record.levelname] = counts.get(record.levelname, 0) + 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that may change after this call returns; the JSON
+        # encoding itself is left to the listener thread. A copy, since other
+        # handlers still see the original record.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.high_mark and record.levelno < logging.WARNING and self.queue.qsize() >= self.high_mark:
+            self._seen += 1
+            if self._seen % self.sample_every:
+                self._count(self.sampled, record)
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._count(self.dropped, record)
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        # Flushes everything still queued
+        _listener.stop()
+        _listener = None
+
+
 def setup_logging():
-    """Setup application logging"""
+    """Setup application logging (safe to call more than once)
+
+    Records are formatted and written by a QueueListener thread, so a slow
+    stdout never stalls request handling.
+    """
+    global _listener, _queue_handler
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(CustomFormatter())
-    
+    logger.setLevel(settings.log_level.upper())
+
+    for existing in list(logger.handlers):
+        if getattr(existing, "_app_handler", False):
+            logger.removeHandler(existing)
+    _stop_listener()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(CustomFormatter())
+
+    handler = DroppingQueueHandler(
+        queue.Queue(maxsize=settings.log_queue_size), sample_every=settings.log_sample_every
+    )
+    # Request context lives in contextvars: it must be read on the request thread
+    handler.addFilter(RequestContextFilter())
+    handler._app_handler = True
+
+    _listener = QueueListener(handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = handler
+
     logger.addHandler(handler)
-    
+
     return logger
 
-app_logger = setup_logging()
\ No newline at end of file
+
+def _log_loss(counts_name: str):
+    def collect():
+        handler = _queue_handler
+        counts = dict(getattr(handler, counts_name)) if handler is not None else {}
+        return [({"level": level}, count) for level, count in counts.items()]
+    return collect
+
+
+registry.register_collector(
+    "log_records_dropped_total", "counter", "Log records dropped because the log queue was full",
+    _log_loss("dropped")
+)
+registry.register_collector(
+    "log_records_sampled_total", "counter", "Low-priority log records skipped while the log queue was backed up",
+    _log_loss("sampled")
+)
+
+atexit.register(_stop_listener)
+
+app_logger = setup_logging()
@@ -0,0 +1,238 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import logging
+import math
+import threading
+import time
+from .config import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Indirection so tests can drive the clock without sleeping
+_now = time.monotonic
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimitRule":
+        """Parse "<requests>/<seconds>", e.g. "100/60" """
+        try:
+            limit, period = spec.split("/")
+            rule = cls(limit=int(limit), period=float(period))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {spec!r}, expected '<requests>/<seconds>'")
+        if rule.limit < 1 or rule.period <= 0:
+            raise ValueError(f"Invalid rate limit {spec!r}")
+        return rule
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is completely full again
+    reset_after: float
+    # Seconds until the next request would be allowed (0 when allowed)
+    retry_after: float
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _result(rule: RateLimitRule, allowed: bool, reset_after: float, retry_after: float) -> RateLimitResult:
+    interval = rule.period / rule.limit
+    # The epsilon absorbs float error, e.g. (60 - 0.2) / 0.2 == 298.999...
+    remaining = math.floor((rule.period - reset_after) / interval + 1e-9) if allowed else 0
+    return RateLimitResult(
+        allowed=allowed,
+        limit=rule.limit,
+        remaining=max(0, min(rule.limit, remaining)),
+        reset_after=max(0.0, reset_after),
+        retry_after=max(0.0, retry_after),
+    )
+
+
+class RateLimiterBackend(ABC):
+    """GCRA limiter: each key stores only its theoretical arrival time (TAT)
+
+    A rule of `limit` requests per `period` admits a request when it arrives no
+    earlier than TAT - period, then pushes TAT forward by period / limit. This
+    is a token bucket of size `limit` refilled continuously, in O(1) memory.
+    """
+
+    # True when hit() is a network round trip; the middleware then calls it off the event loop
+    blocking = False
+
+    @abstractmethod
+    def hit(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryRateLimiter(RateLimiterBackend):
+    """Per-process limiter; idle keys are swept and the key count is capped"""
+
+    def __init__(self, max_keys: int = 100000, sweep_interval: float = 60.0):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = _now() + sweep_interval
+
+    def hit(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        interval = rule.period / rule.limit
+        with self._lock:
+            now = _now()
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + interval
+            allow_at = new_tat - rule.period
+            if now < allow_at:
+                return _result(rule, False, tat - now, allow_at - now)
+
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                # Dropping the least recently seen key only forgives its debt
+                self._tats.popitem(last=False)
+                self.evictions += 1
+            return _result(rule, True, new_tat - now, 0.0)
+
+    def _sweep(self, now: float) -> None:
+        # A key whose TAT has passed behaves exactly like a missing key
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# Same algorithm as MemoryRateLimiter, run atomically on the server with the
+# server clock so all workers agree; keys expire once their bucket is full.
+_GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, tat - now, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.max(1, math.ceil(new_tat - now)))
+return {1, new_tat - now, 0}
+"""
+
+
+class RedisRateLimiter(RateLimiterBackend):
+    """Limiter shared between workers, backed by any Redis-protocol server"""
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        namespace: str = "ratelimit",
+        client: Any = None
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for the redis rate limit backend")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._prefix = f"{namespace}:"
+        self._script = client.register_script(_GCRA_SCRIPT)
+
+    def hit(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        interval_ms = max(1, int(rule.period * 1000 / rule.limit))
+        try:
+            allowed, reset_ms, retry_ms = self._script(
+                keys=[self._prefix + key], args=[interval_ms, int(rule.period * 1000)]
+            )
+        except Exception as exc:
+            # Fail open: an unreachable store must not take the API down with it
+            logger.warning(f"Rate limit store unavailable: {exc}")
+            return _result(rule, True, 0.0, 0.0)
+        return _result(rule, bool(allowed), reset_ms / 1000, retry_ms / 1000)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class RateLimitPolicy:
+    """Picks the rule for a request: the most specific route rule, else the default
+
+    Route rules are keyed "METHOD /path-prefix" or "/path-prefix" (any method).
+    """
+
+    def __init__(self, default: str, user_default: str, routes: Dict[str, str]):
+        self.default = RateLimitRule.parse(default)
+        self.user_default = RateLimitRule.parse(user_default)
+        self.routes = []
+        for pattern, spec in routes.items():
+            method, _, prefix = pattern.rpartition(" ")
+            self.routes.append((prefix, method.upper() or None, pattern, RateLimitRule.parse(spec)))
+        # Longest prefix first; a method-specific rule beats an any-method rule
+        self.routes.sort(key=lambda route: (len(route[0]), route[1] is not None), reverse=True)
+
+    def resolve(self, method: str, path: str, authenticated: bool) -> Tuple[str, RateLimitRule]:
+        for prefix, rule_method, name, rule in self.routes:
+            if path.startswith(prefix) and rule_method in (None, method):
+                return name, rule
+        if authenticated:
+            return "user", self.user_default
+        return "default", self.default
+
+
+def create_rate_limiter() -> RateLimiterBackend:
+    """Build a limiter for the backend selected in settings"""
+    if settings.rate_limit_backend == "memory":
+        return MemoryRateLimiter(max_keys=settings.rate_limit_max_keys)
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimiter(url=settings.rate_limit_url or settings.cache_url)
+    raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+
+
+rate_limiter = create_rate_limiter()
+
+rate_limit_policy = RateLimitPolicy(
+    default=settings.rate_limit_default,
+    user_default=settings.rate_limit_user,
+    routes=settings.rate_limit_routes
+)
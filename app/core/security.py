@@ -1,48 +1,249 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union
-from jose import JWTError, jwt
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from jose import JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from .cache import MemoryCache, caches
+from .concurrency import call_blocking
 from .config import settings
+from .keys import key_ring
+from .metrics import PASSWORD_HASH_DURATION, registry
+from .token_denylist import DenylistUnavailable, token_denylist
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+# Hashes below the configured cost are flagged by needs_update and upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+)
+
+
+class PasswordHashPool:
+    """Bounded worker pool dedicated to bcrypt work
+
+    bcrypt releases the GIL, so threads hash in parallel. Work beyond
+    `max_workers + max_queue` outstanding jobs is rejected with a 503 instead of
+    queueing, so a login storm can't starve the request threadpool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+    
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        
+        future = self._executor.submit(self._timed, fn, *args)
+        future.add_done_callback(self._release)
+        return future
+    
+    def run(self, fn: Callable, *args: Any) -> Any:
+        return self.submit(fn, *args).result()
+    
+    async def run_async(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+    
+    def stats(self) -> Dict[str, Any]:
+        pending = self._pending
+        return {
+            "workers": self.max_workers,
+            "in_flight": min(pending, self.max_workers),
+            "queued": max(pending - self.max_workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "total_seconds": self.total_seconds,
+        }
+    
+    def _timed(self, fn: Callable, *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            PASSWORD_HASH_DURATION.observe(elapsed)
+            with self._lock:
+                self.total_seconds += elapsed
+    
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+
+password_pool = PasswordHashPool(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size
+)
+
+registry.register_collector(
+    "password_hash_pool_jobs", "gauge", "Jobs on the password hashing pool by state",
+    lambda: [({"state": state}, password_pool.stats()[state]) for state in ("in_flight", "queued")]
+)
+registry.register_collector(
+    "password_hash_pool_rejected_total", "counter", "Hashing jobs rejected because the pool was full",
+    lambda: [({}, password_pool.rejected)]
+)
+
+
+# Claims of tokens whose signature has already been checked, keyed by token
+# digest and kept no longer than the token itself is valid. Per process only:
+# a verified token is no secret, but sharing it would not save a round trip
+verified_tokens = MemoryCache(max_size=settings.token_cache_max_size)
+caches["verified_token"] = verified_tokens
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def _denylist_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Token revocation service is unavailable, please retry",
+        headers={"Retry-After": "1"},
+    )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class SecurityManager:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_pool.run(pwd_context.verify, plain_password, hashed_password)
     
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+        return password_pool.run(pwd_context.hash, password)
+    
+    @staticmethod
+    def verify_and_update(
+        plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a replacement hash when the stored one is outdated"""
+        return password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        return await password_pool.run_async(pwd_context.hash, password)
+    
+    @staticmethod
+    async def verify_and_update_async(
+        plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await password_pool.run_async(
+            pwd_context.verify_and_update, plain_password, hashed_password
+        )
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+        if expires_delta is None:
+            expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
+        return SecurityManager._encode(data, ACCESS_TOKEN, expires_delta)
+    
+    @staticmethod
+    def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+        """Long-lived token accepted only by the refresh endpoint"""
+        if expires_delta is None:
+            expires_delta = timedelta(days=settings.refresh_token_expire_days)
+        return SecurityManager._encode(data, REFRESH_TOKEN, expires_delta)
+    
+    @staticmethod
+    def _encode(data: dict, token_type: str, expires_delta: timedelta) -> str:
         to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=settings.access_token_expire_minutes
-            )
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(
-            to_encode, settings.secret_key, algorithm=settings.algorithm
-        )
-        return encoded_jwt
+        issued_at = datetime.utcnow()
+        to_encode.update({
+            "iat": issued_at,
+            "exp": issued_at + expires_delta,
+            # Unique id, so a single token can be revoked
+            "jti": uuid.uuid4().hex,
+            "type": token_type,
+        })
+        return key_ring.sign(to_encode)
     
     @staticmethod
-    def verify_token(token: str) -> dict:
-        try:
-            payload = jwt.decode(
-                token, settings.secret_key, algorithms=[settings.algorithm]
-            )
-            return payload
-        except JWTError:
+    def verify_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+        digest = _token_digest(token)
+        payload = verified_tokens.get(digest)
+        if payload is None:
+            try:
+                payload = key_ring.verify(token)
+            except JWTError:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            ttl = payload["exp"] - time.time() if "exp" in payload else 0
+            if ttl > 0:
+                verified_tokens.set(digest, payload, ttl=ttl)
+        # The cached claims are shared; callers get their own copy
+        payload = dict(payload)
+        
+        # Tokens issued before refresh tokens existed carry no type: access tokens
+        if payload.get("type", ACCESS_TOKEN) != token_type:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        
+        jti = payload.get("jti")
+        if jti is not None and SecurityManager._is_revoked(jti, payload["exp"], token_type):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return payload
+    
+    @staticmethod
+    def _is_revoked(jti: str, expires_at: float, token_type: str) -> bool:
+        try:
+            return token_denylist.is_revoked(jti, expires_at)
+        except DenylistUnavailable:
+            # Short-lived access tokens may ride out an outage; refresh tokens
+            # mint new ones, so by default they wait for the denylist
+            if token_type in settings.token_denylist_fail_open:
+                return False
+            raise _denylist_unavailable()
+    
+    @staticmethod
+    async def verify_token_async(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+        return await call_blocking(
+            token_denylist.blocking, SecurityManager.verify_token, token, token_type
+        )
+    
+    @staticmethod
+    def revoke_token(payload: dict) -> bool:
+        """Revoke a verified token until it expires; False if it already was"""
+        jti = payload.get("jti")
+        if jti is None:
+            return True
+        try:
+            return token_denylist.revoke(jti, payload["exp"])
+        except DenylistUnavailable:
+            raise _denylist_unavailable()
 
 security = SecurityManager()
\ No newline at end of file
@@ -1,15 +1,47 @@
-from fastapi import Request
-from fastapi.responses import Response
-
-async def security_headers_middleware(request: Request, call_next):
-    response: Response = await call_next(request)
-    
-    # Security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
-    
-    return response
\ No newline at end of file
+from typing import Iterable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+CONTENT_SECURITY_POLICY = (b"content-security-policy", b"default-src 'self'")
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware adding security headers to every HTTP response
+
+    The header lists are built once; per request only the response start
+    message is touched. Paths in `csp_exempt_paths` (the interactive docs,
+    which load their assets from a CDN) get no Content-Security-Policy.
+    """
+
+    def __init__(self, app: ASGIApp, csp_exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.csp_exempt_paths = tuple(csp_exempt_paths)
+        self.headers = SECURITY_HEADERS + [CONTENT_SECURITY_POLICY]
+        self.headers_without_csp = list(SECURITY_HEADERS)
+        self.names = {name for name, _ in self.headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        if self.csp_exempt_paths and scope["path"].startswith(self.csp_exempt_paths):
+            headers = self.headers_without_csp
+        else:
+            headers = self.headers
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Ours win over any the application set itself
+                message["headers"] = [
+                    *(header for header in message.get("headers", ()) if header[0] not in self.names),
+                    *headers,
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
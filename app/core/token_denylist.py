@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Set
+import logging
+import math
+import threading
+import time
+from .config import settings
+from .metrics import registry
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Token expiry is wall-clock epoch seconds; indirection so tests can move it
+_now = time.time
+
+
+def _compact(jti: str) -> bytes:
+    # uuid4 hex ids take 16 bytes instead of a 32 character str
+    try:
+        return bytes.fromhex(jti)
+    except ValueError:
+        return jti.encode()
+
+
+class DenylistUnavailable(Exception):
+    """The denylist could not be reached, so revocation is unknown"""
+
+
+class TokenDenylist(ABC):
+    """Revoked token ids (jti), each kept only until its token expires anyway"""
+
+    # True when lookups are network round trips; async code then verifies tokens in the threadpool
+    blocking = False
+
+    @abstractmethod
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """Revoke a token; False when it was already revoked"""
+
+    @abstractmethod
+    def is_revoked(self, jti: str, expires_at: float) -> bool:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryTokenDenylist(TokenDenylist):
+    """Per-process denylist bucketed by expiry time
+
+    A token's own `exp` names the only bucket it can be in, so a lookup is one
+    dict access and one set probe. Buckets whose tokens have all expired are
+    dropped whole, so there is no per-entry expiry bookkeeping.
+    """
+
+    def __init__(self, bucket_seconds: int = 60):
+        self.bucket_seconds = bucket_seconds
+        self._buckets: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def _bucket(self, expires_at: float) -> int:
+        return math.ceil(expires_at / self.bucket_seconds)
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        now = _now()
+        if expires_at <= now:
+            return True
+        key = _compact(jti)
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+            bucket = self._buckets.setdefault(self._bucket(expires_at), set())
+            if key in bucket:
+                return False
+            bucket.add(key)
+            return True
+
+    def is_revoked(self, jti: str, expires_at: float) -> bool:
+        bucket = self._buckets.get(self._bucket(expires_at))
+        return bucket is not None and _compact(jti) in bucket
+
+    def _prune(self, now: float) -> None:
+        current = self._bucket(now)
+        for index in [index for index in self._buckets if index < current]:
+            del self._buckets[index]
+        self._next_prune = now + self.bucket_seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets.values())
+
+
+class RedisTokenDenylist(TokenDenylist):
+    """Denylist shared between workers; entries expire with their tokens"""
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        namespace: str = "revoked",
+        client: Any = None
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for the redis token denylist")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._prefix = f"{namespace}:"
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        ttl_ms = int((expires_at - _now()) * 1000)
+        if ttl_ms <= 0:
+            return True
+        try:
+            return bool(self._client.set(self._prefix + jti, 1, px=ttl_ms, nx=True))
+        except Exception as exc:
+            logger.warning(f"Token denylist unavailable: {exc}")
+            raise DenylistUnavailable(str(exc)) from exc
+
+    def is_revoked(self, jti: str, expires_at: float) -> bool:
+        try:
+            return bool(self._client.exists(self._prefix + jti))
+        except Exception as exc:
+            # Whether to trust the token anyway is the caller's call (per token type)
+            logger.warning(f"Token denylist unavailable: {exc}")
+            raise DenylistUnavailable(str(exc)) from exc
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_token_denylist() -> TokenDenylist:
+    """Build a denylist for the backend selected in settings"""
+    if settings.token_denylist_backend == "memory":
+        return MemoryTokenDenylist(bucket_seconds=settings.token_denylist_bucket_seconds)
+    if settings.token_denylist_backend == "redis":
+        return RedisTokenDenylist(url=settings.token_denylist_url or settings.cache_url)
+    raise ValueError(f"Unknown token denylist backend: {settings.token_denylist_backend}")
+
+
+token_denylist = create_token_denylist()
+
+if isinstance(token_denylist, MemoryTokenDenylist):
+    registry.register_collector(
+        "revoked_tokens", "gauge", "Revoked tokens that have not expired yet",
+        lambda: [({}, len(token_denylist))]
+    )
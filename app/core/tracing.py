@@ -0,0 +1,108 @@
+"""Request-scoped context (request id, user id, span timings)
+
+The trace object lives in a contextvar set once per request. It is mutated in
+place rather than re-set, because sync dependencies and endpoints run in
+threadpool copies of the context and a re-set there would never reach the
+middleware or later log records.
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi.routing import APIRoute
+
+
+class RequestTrace:
+    __slots__ = ("request_id", "user_id", "spans", "endpoint_finished")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.user_id: Optional[int] = None
+        # Span name -> accumulated seconds
+        self.spans: Dict[str, float] = {}
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block into the current request's trace (no-op outside a request)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def set_user(user_id: Optional[int]) -> None:
+    trace = current_trace.get()
+    if trace is not None:
+        trace.user_id = user_id
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp log records with the current request and user ids"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = current_trace.get()
+        if trace is not None:
+            if not hasattr(record, "request_id"):
+                record.request_id = trace.request_id
+            if trace.user_id is not None and not hasattr(record, "user_id"):
+                record.user_id = trace.user_id
+        return True
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    def finish(started: float) -> None:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.endpoint_finished = time.perf_counter()
+            trace.add("service", trace.endpoint_finished - started)
+
+    # The wrapper keeps the endpoint's kind: FastAPI runs sync endpoints in the threadpool
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finish(started)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                finish(started)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """APIRoute recording the endpoint body as the "service" span
+
+    Serialization is measured by the request context middleware, from the end of
+    the endpoint to the start of the response.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        if not getattr(endpoint, "__traced__", False):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -1,29 +1,58 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response
 from sqlalchemy.exc import SQLAlchemyError
+import asyncio
 import logging
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 from .core.config import settings
-from .core.database import engine, Base
+from .core.database import (
+    engine, async_engine, replicas, Base, SessionLocal, ping, ping_async, pool_status
+)
+from .core.keys import key_ring
+from .core.logging import setup_logging
+from .core.metrics import registry
+from .core.security_headers import SecurityHeadersMiddleware
 from .api.v1 import api_router
+from .middleware import MetricsMiddleware, RateLimitMiddleware, RequestContextMiddleware
+from .services.identity_filter import identity_filter
+from .utils.http_cache import HttpCacheUtils
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scans the users table, so it runs beside the server rather than in a request
+    identity_filter.load_in_background(SessionLocal)
+    yield
+
 app = FastAPI(
     title=settings.project_name,
     version=settings.version,
     description=settings.description,
     openapi_url="/api/v1/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    # Renders response_model output with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
+# Rate limiting runs inside CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +62,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(SecurityHeadersMiddleware, csp_exempt_paths=("/docs", "/redoc"))
+
+# Request ids and spans for everything below, including rate-limit rejections
+app.add_middleware(RequestContextMiddleware)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -64,6 +101,58 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Ready when the primary answers and its pool has headroom; 503 otherwise
+
+    Replicas are reported but never fail the check: their reads fall back to the primary.
+    """
+    ready = True
+    databases = {}
+    checks = [("default", engine, False, True)]
+    if async_engine is not None:
+        checks.append(("async", async_engine, True, True))
+    checks.extend((name, replica, False, False) for name, replica in replicas.engines.items())
+    
+    for name, db_engine, is_async, required in checks:
+        report = pool_status(db_engine.sync_engine if is_async else db_engine)
+        if not required:
+            report["ejected"] = replicas.is_ejected(name)
+        saturation = report.get("saturation")
+        if saturation is not None and saturation >= settings.health_ready_max_pool_saturation:
+            # Skip the ping: it would only queue behind the requests we're warning about
+            report["error"] = "connection pool saturated"
+        else:
+            try:
+                latency = await asyncio.wait_for(
+                    ping_async(db_engine) if is_async else run_in_threadpool(ping, db_engine),
+                    timeout=settings.health_ready_timeout_seconds
+                )
+                report["latency_ms"] = round(latency * 1000, 2)
+            except Exception as exc:
+                report["error"] = type(exc).__name__
+        if required:
+            ready = ready and "error" not in report
+        databases[name] = report
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "databases": databases}
+    )
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks(request: Request):
+    """Public keys that verify our access tokens, for services that check them offline"""
+    body, etag = key_ring.jwks()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.jwks_max_age_seconds}"}
+    if HttpCacheUtils.is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
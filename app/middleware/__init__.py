@@ -1,40 +1,182 @@
-from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
+import logging
+import re
 import time
-from collections import defaultdict, deque
-from typing import Dict, Deque
-
-class RateLimiter:
-    def __init__(self, max_requests: int = 100, window_seconds: int = 60):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.requests: Dict[str, Deque[float]] = defaultdict(deque)
-    
-    def is_allowed(self, client_id: str) -> bool:
-        now = time.time()
-        client_requests = self.requests[client_id]
-        
-        # Remove old requests outside the window
-        while client_requests and client_requests[0] <= now - self.window_seconds:
-            client_requests.popleft()
-        
-        # Check if under limit
-        if len(client_requests) < self.max_requests:
-            client_requests.append(now)
-            return True
-        
-        return False
-    
-rate_limiter = RateLimiter()
-
-async def rate_limit_middleware(request: Request, call_next):
-    client_ip = request.client.host
-    
-    if not rate_limiter.is_allowed(client_ip):
-        return JSONResponse(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={"detail": "Rate limit exceeded"}
-        )
-    
-    response = await call_next(request)
-    return response
\ No newline at end of file
+import uuid
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..core.concurrency import call_blocking
+from ..core.config import settings
+from ..core.metrics import (
+    DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, HTTP_REQUESTS, HTTP_REQUEST_DURATION,
+    QueryStats, current_query_stats
+)
+from ..core.rate_limit import RateLimitResult, rate_limiter, rate_limit_policy
+from ..core.security import security
+from ..core.token_denylist import token_denylist
+from ..core.tracing import RequestTrace, current_trace
+
+access_logger = logging.getLogger("app.access")
+
+# Client-supplied ids are echoed into logs and headers, so keep them tame
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+def _client_identity(headers: Headers, client: Optional[Tuple[str, int]]) -> str:
+    """Bucket owner: the token subject when a valid bearer token is sent, else the client IP"""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = security.verify_token(token).get("sub")
+        except HTTPException:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{client[0] if client else 'unknown'}"
+
+def _hit(scope: Scope) -> RateLimitResult:
+    identity = _client_identity(Headers(scope=scope), scope.get("client"))
+    name, rule = rate_limit_policy.resolve(
+        scope["method"], scope["path"], authenticated=identity.startswith("user:")
+    )
+    return rate_limiter.hit(f"{name}:{identity}", rule)
+
+class RateLimitMiddleware:
+    """Pure ASGI rate limiting: headers are added to the response start message,
+    so the body streams through untouched"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or scope["path"] in settings.rate_limit_exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        # Redis-backed limiters and denylists would stall the event loop for a round trip
+        result = await call_blocking(rate_limiter.blocking or token_denylist.blocking, _hit, scope)
+        
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Rate limit exceeded"},
+                headers=result.headers()
+            )
+            await response(scope, receive, send)
+            return
+        
+        extra_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in result.headers().items()
+        ]
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *extra_headers]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
+
+def _route_template(scope: Scope) -> str:
+    # Templates keep label cardinality bounded: /tasks/{task_id}, not /tasks/42
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope["path"] if "endpoint" in scope else "unmatched"
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and database work per route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        query_stats = QueryStats()
+        token = current_query_stats.set(query_stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_query_stats.reset(token)
+            labels = (scope["method"], _route_template(scope), status_code)
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.observe(query_stats.count)
+            DB_TIME_PER_REQUEST.observe(query_stats.seconds)
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware assigning each request an id and timing its spans
+
+    The id comes from a well-formed X-Request-ID header or is generated, is
+    echoed in the response, and is attached to every log record emitted while
+    the request is served. One access log line per request carries the spans.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        trace = RequestTrace(request_id)
+        token = current_trace.set(trace)
+        query_stats = current_query_stats.get()
+        status_code = 500
+        started = time.perf_counter()
+        
+        async def send_with_context(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trace.endpoint_finished is not None:
+                    trace.add("serialization", time.perf_counter() - trace.endpoint_finished)
+                if query_stats is not None:
+                    trace.spans["db"] = query_stats.seconds
+                timing = ", ".join(
+                    f"{name};dur={seconds * 1000:.1f}" for name, seconds in trace.spans.items()
+                )
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    *([(b"server-timing", timing.encode("latin-1"))] if timing else []),
+                ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_context)
+        finally:
+            access_logger.info(
+                "%s %s %s", scope["method"], scope["path"], status_code,
+                extra={"fields": {
+                    "method": scope["method"],
+                    "route": _route_template(scope),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "db_queries": query_stats.count if query_stats is not None else None,
+                    "spans_ms": {name: round(seconds * 1000, 2) for name, seconds in trace.spans.items()},
+                }}
+            )
+            current_trace.reset(token)
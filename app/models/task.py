@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import (
+    BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index, DDL, event
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -12,6 +14,18 @@ class TaskStatus(PyEnum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves per-user listings ordered by id (keyset pagination)
+        Index("ix_tasks_created_by_id", "created_by", "id"),
+        # Serves per-user change feeds (incremental sync)
+        Index("ix_tasks_created_by_version", "created_by", "version"),
+        # Serves per-user listings filtered by status and/or a created_at range
+        Index("ix_tasks_created_by_status_created_at", "created_by", "status", "created_at"),
+        # Full-text search on MySQL; SQLite uses the tasks_fts table below
+        Index(
+            "ix_tasks_title_description_fulltext", "title", "description", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
@@ -20,6 +34,39 @@ class Task(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Position in the owner's order of task writes, see TaskSyncService
+    version = Column(BigInteger, nullable=False, server_default="0")
     
     # Relationship
-    creator = relationship("User", back_populates="tasks")
\ No newline at end of file
+    creator = relationship("User", back_populates="tasks")
+
+
+# SQLite full-text index: an external-content FTS5 table kept in sync by triggers
+SQLITE_FTS_TABLE = "tasks_fts"
+
+_sqlite_fts_ddl = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} "
+    "USING fts5(title, description, content='tasks', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    # Index rows that predate the table (no-op on a fresh database)
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+for _statement in _sqlite_fts_ddl:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}").execute_if(dialect="sqlite")
+)
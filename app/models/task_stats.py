@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, ForeignKey, Enum
+from ..core.database import Base
+from .task import TaskStatus
+
+class TaskStatusCount(Base):
+    """Number of tasks per (owner, status), maintained by TaskService writes"""
+    __tablename__ = "task_status_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(Enum(TaskStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+class TaskVersionCounter(Base):
+    """Last task version handed out per owner, bumped inside each write it numbers"""
+    __tablename__ = "task_version_counters"
+
+    # No foreign key: the counter outlives its user so their tombstones stay ordered
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    # Newest version whose tombstones have been pruned
+    pruned_through = Column(BigInteger, nullable=False, default=0)
+
+class TaskTombstone(Base):
+    """A deleted task, kept so incremental sync can report the deletion"""
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        # Serves per-owner change feeds
+        Index("ix_task_tombstones_owner_id_version", "owner_id", "version"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Optional, List, Dict
 from datetime import datetime
 from ..models.task import TaskStatus
 
@@ -24,6 +24,61 @@ class TaskResponse(TaskBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+# Listing sort keys; a leading "-" sorts descending
+TASK_SORT_PATTERN = "^-?(id|created_at|updated_at|title|status)$"
+
+class TaskFilter(BaseModel):
+    status: Optional[TaskStatus] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    q: Optional[str] = Field(None, min_length=1, max_length=200)
+    sort: str = Field("id", pattern=TASK_SORT_PATTERN)
+
+class TaskPage(BaseModel):
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+# Upper bound on items per bulk request (one transaction each)
+BULK_MAX_ITEMS = 5000
+
+class TaskBulkCreate(BaseModel):
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkUpdate(BaseModel):
+    items: List[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class TaskBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    task: Optional[TaskResponse] = None
+
+class TaskBulkResponse(BaseModel):
+    results: List[TaskBulkResult]
+
+class TaskStats(BaseModel):
+    # None for the global (all users) figures
+    user_id: Optional[int] = None
+    total: int
+    counts: Dict[TaskStatus, int]
+    completion_rate: float
+
+class TaskChanges(BaseModel):
+    # Apply `deleted` (ids may be unknown to the client) before `tasks`;
+    # pass `next_since` back to get later changes
+    tasks: List[TaskResponse]
+    deleted: List[int]
+    next_since: str
+    has_more: bool
+
 class TaskWithUser(TaskResponse):
     creator: "UserResponse"
 
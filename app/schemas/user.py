@@ -31,8 +31,16 @@ class UserLogin(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
     user: UserResponse
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    # Also revoke this refresh token (otherwise only the presented access token)
+    refresh_token: Optional[str] = None
+
 class TokenData(BaseModel):
     username: Optional[str] = None
\ No newline at end of file
@@ -1,47 +1,134 @@
 from datetime import timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from ..core.security import security
+from ..core.concurrency import call_blocking
+from ..core.security import security, REFRESH_TOKEN
+from ..core.token_denylist import token_denylist
 from ..models.user import User
 from ..schemas.user import UserLogin, Token, UserResponse
-from .user_service import user_service
+from .user_service import user_service, async_user_service
+
+
+def _issue_token(user: Optional[User]) -> Token:
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username/email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+
+    claims = {"sub": user.username}
+    # Lets task routes authorize from the token alone (see get_authorized_user)
+    access_claims = {
+        **claims,
+        "user_id": user.id,
+        "role": user.role.value,
+        "is_active": user.is_active,
+    }
+    return Token(
+        access_token=security.create_access_token(data=access_claims),
+        refresh_token=security.create_refresh_token(data=claims),
+        token_type="bearer",
+        user=UserResponse.model_validate(user)
+    )
+
+
+def _invalid_token(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _spend_refresh_token(refresh_token: str) -> str:
+    """Verify a refresh token and revoke it (rotation), returning its subject"""
+    payload = security.verify_token(refresh_token, token_type=REFRESH_TOKEN)
+    if not security.revoke_token(payload):
+        # A concurrent refresh spent it first
+        raise _invalid_token("Token has been revoked")
+    return payload["sub"]
+
+
+def _logout(access_payload: dict, refresh_token: Optional[str]) -> None:
+    if refresh_token is not None:
+        refresh_payload = security.verify_token(refresh_token, token_type=REFRESH_TOKEN)
+        if refresh_payload.get("sub") != access_payload.get("sub"):
+            raise _invalid_token()
+        security.revoke_token(refresh_payload)
+    security.revoke_token(access_payload)
+
 
 class AuthService:
     def authenticate_user(self, db: Session, login_data: UserLogin) -> Optional[User]:
-        # Try to get user by username first, then by email
-        user = user_service.get_user_by_username(db, login_data.username_or_email)
+        # Username or email, in one query
+        user = user_service.get_user_by_login(db, login_data.username_or_email)
+        
         if not user:
-            user = user_service.get_user_by_email(db, login_data.username_or_email)
+            return None
         
-        if not user or not security.verify_password(login_data.password, user.hashed_password):
+        valid, new_hash = security.verify_and_update(login_data.password, user.hashed_password)
+        if not valid:
             return None
         
+        if new_hash:
+            # Transparently upgrade hashes made with an older cost factor
+            user.hashed_password = new_hash
+            db.commit()
+        
         return user
     
     def login(self, db: Session, login_data: UserLogin) -> Token:
         user = self.authenticate_user(db, login_data)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username/email or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Inactive user"
-            )
-        
-        access_token = security.create_access_token(
-            data={"sub": user.username}
-        )
+        return _issue_token(user)
+    
+    def refresh(self, db: Session, refresh_token: str) -> Token:
+        """New token pair from a refresh token, without password verification"""
+        username = _spend_refresh_token(refresh_token)
+        return _issue_token(user_service.get_principal(db, username))
+    
+    def logout(self, access_payload: dict, refresh_token: Optional[str] = None) -> None:
+        """Revoke the presented access token, and the session's refresh token if given"""
+        _logout(access_payload, refresh_token)
+
 
-        return Token(
-            access_token=access_token,
-            token_type="bearer",
-            user=UserResponse.model_validate(user)
+class AsyncAuthService:
+    """AuthService counterpart for AsyncSession-backed routes"""
+
+    async def authenticate_user(self, db: AsyncSession, login_data: UserLogin) -> Optional[User]:
+        user = await async_user_service.get_user_by_login(db, login_data.username_or_email)
+        
+        if not user:
+            return None
+        
+        valid, new_hash = await security.verify_and_update_async(
+            login_data.password, user.hashed_password
         )
+        if not valid:
+            return None
+        
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+        
+        return user
+    
+    async def login(self, db: AsyncSession, login_data: UserLogin) -> Token:
+        user = await self.authenticate_user(db, login_data)
+        return _issue_token(user)
     
-auth_service = AuthService()
\ No newline at end of file
+    async def refresh(self, db: AsyncSession, refresh_token: str) -> Token:
+        username = await call_blocking(token_denylist.blocking, _spend_refresh_token, refresh_token)
+        return _issue_token(await async_user_service.get_principal(db, username))
+
+
+auth_service = AuthService()
+async_auth_service = AsyncAuthService()
\ No newline at end of file
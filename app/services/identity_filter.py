@@ -0,0 +1,122 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..core.bloom import BloomFilter
+from ..core.config import settings
+from ..core.database import REPLICA_READ
+from ..core.metrics import registry
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityFilter:
+    """Bloom filter over taken usernames and emails
+
+    A miss means the name is definitely free, so registration can skip the
+    duplicate probe. The filter may lag behind other workers; the unique
+    indexes still reject those duplicates at INSERT time. Keys are lowercased
+    so case-insensitive collations never produce a false "free".
+
+    The filter is built off the request path (at startup, and again at double
+    size once full); until the first build finishes every name counts as
+    possibly taken, so registration probes the database as before.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lookups = {"free": 0, "maybe_taken": 0}
+        self._filter: Optional[BloomFilter] = None
+        self._session_factory: Optional[Callable[[], Session]] = None
+        # Keys added while a build scans the table; None when no build is running
+        self._pending: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    def load_in_background(self, session_factory: Callable[[], Session]) -> None:
+        """Start building the filter on a daemon thread (no-op while one is running)"""
+        self._session_factory = session_factory
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+        threading.Thread(target=self._load, name="identity-filter", daemon=True).start()
+
+    def load(self, session_factory: Callable[[], Session]) -> None:
+        """Build the filter from the users table in the calling thread"""
+        self._session_factory = session_factory
+        with self._lock:
+            if self._pending is None:
+                self._pending = []
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            current = self._filter
+            capacity = self.capacity
+            if current is not None:
+                capacity = max(capacity, current.count * 2)
+            bloom = BloomFilter(capacity, self.error_rate)
+            with self._session_factory() as db:
+                rows = db.execute(
+                    select(User.username, User.email).execution_options(yield_per=5000),
+                    bind_arguments=REPLICA_READ
+                )
+                for username, email in rows:
+                    bloom.add(f"u:{username.lower()}")
+                    bloom.add(f"e:{email.lower()}")
+            with self._lock:
+                # Registrations that committed during the scan
+                for key in self._pending or ():
+                    bloom.add(key)
+                self.capacity = capacity
+                self._filter = bloom
+        except Exception as exc:
+            # Registration keeps probing the database; the next build retries
+            logger.warning(f"Identity filter not built: {exc}")
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def might_exist(self, username: str, email: str) -> bool:
+        bloom = self._filter
+        maybe = (
+            bloom is None
+            or f"u:{username.lower()}" in bloom
+            or f"e:{email.lower()}" in bloom
+        )
+        self.lookups["maybe_taken" if maybe else "free"] += 1
+        return maybe
+
+    def add(self, username: str, email: str) -> None:
+        keys = (f"u:{username.lower()}", f"e:{email.lower()}")
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(keys)
+            bloom = self._filter
+            if bloom is not None:
+                for key in keys:
+                    bloom.add(key)
+        if bloom is not None and bloom.is_full and self._session_factory is not None:
+            # Past capacity the false-positive rate climbs; rebuild at double size
+            self.load_in_background(self._session_factory)
+
+    def clear(self) -> None:
+        """Forget everything; nothing is used until the next build"""
+        with self._lock:
+            self._filter = None
+            self._session_factory = None
+
+
+identity_filter = IdentityFilter(
+    capacity=settings.identity_filter_capacity,
+    error_rate=settings.identity_filter_error_rate
+)
+
+registry.register_collector(
+    "registration_identity_lookups_total", "counter",
+    "Registration duplicate checks answered by the identity Bloom filter",
+    lambda: [({"result": result}, count) for result, count in identity_filter.lookups.items()]
+)
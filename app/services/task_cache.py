@@ -0,0 +1,159 @@
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+from pydantic_core import to_json
+from ..core.cache import CacheBackend, create_cache
+from ..core.config import settings
+from ..models.task import Task
+from ..schemas.task import TaskResponse
+from ..utils.pagination import CursorUtils
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# TaskResponse field order; listing rows are selected in this order
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+
+
+@dataclass
+class CachedPayload:
+    """Serialized response body together with its validators"""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @classmethod
+    def build(cls, body: bytes, last_modified: Optional[datetime] = None) -> "CachedPayload":
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        return cls(body=body, etag=etag, last_modified=last_modified)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-safe form, as stored in the cache backend"""
+        return {
+            "body": self.body.decode(),
+            "etag": self.etag,
+            "last_modified": self.last_modified.isoformat() if self.last_modified else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedPayload":
+        last_modified = data["last_modified"]
+        return cls(
+            body=data["body"].encode(),
+            etag=data["etag"],
+            last_modified=datetime.fromisoformat(last_modified) if last_modified else None,
+        )
+
+
+def _dumps(value: Any) -> bytes:
+    # Same output as pydantic's model_dump_json (UTC as "Z"), without the model
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+    return to_json(value)
+
+
+def encode_task_rows(rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """TaskResponse-shaped dicts from (TASK_FIELDS ordered) column tuples
+
+    The rows come straight from the tasks table, so they are not re-validated.
+    """
+    return [dict(zip(TASK_FIELDS, row)) for row in rows]
+
+
+def task_payload(task: Task) -> CachedPayload:
+    return CachedPayload.build(
+        TaskResponse.model_validate(task).model_dump_json().encode(),
+        task.updated_at or task.created_at
+    )
+
+
+def listing_payload(rows: Sequence[Any], limit: int, cursor_mode: bool) -> CachedPayload:
+    """Serialize a listing from column rows (see TaskService.get_tasks(as_rows=True))
+
+    Listings only get an ETag: the newest timestamp on a page doesn't move
+    when a task leaves it, so it can't tell whether the page changed.
+    """
+    items = encode_task_rows(rows)
+    if cursor_mode:
+        # A full page gets a cursor for the next one
+        next_cursor = CursorUtils.encode_cursor({"id": items[-1]["id"]}) if len(items) == limit else None
+        body = _dumps({"items": items, "next_cursor": next_cursor})
+    else:
+        body = _dumps(items)
+    return CachedPayload.build(body)
+
+
+class TaskCache:
+    """Serialized task payloads, invalidated by TaskService writes
+
+    Entries are keyed under their scope's generation token (the owner's, or
+    ALL for admins), so a write only has to replace the tokens instead of
+    finding every cached page of that owner. A read that raced the write can
+    then only store its old payload under a key nobody looks up again.
+    """
+
+    ALL = "all"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @property
+    def blocking(self) -> bool:
+        return self.backend.blocking
+
+    def _generation(self, scope: Union[int, str]) -> str:
+        key = f"gen:{scope}"
+        generation = self.backend.get(key)
+        if generation is None:
+            # A missing token (never set or evicted) must not revive old entries
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation, ttl=0)
+        return generation
+
+    def _bump(self, scope: Union[int, str]) -> None:
+        self.backend.set(f"gen:{scope}", uuid.uuid4().hex, ttl=0)
+
+    def task_key(self, scope: Union[int, str], task_id: int) -> str:
+        return f"task:{scope}:{self._generation(scope)}:{task_id}"
+
+    def listing_key(self, scope: Union[int, str], **params) -> str:
+        encoded = ":".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"list:{scope}:{self._generation(scope)}:{encoded}"
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        data = self.backend.get(key)
+        return CachedPayload.from_dict(data) if data is not None else None
+
+    def set(self, key: str, payload: CachedPayload) -> None:
+        self.backend.set(key, payload.as_dict())
+
+    def invalidate(self, task_id: int, owner_id: int) -> None:
+        """Drop a task and every listing that may contain it"""
+        self.invalidate_many({task_id: owner_id})
+
+    def invalidate_many(self, tasks: Dict[int, int]) -> None:
+        """Drop several tasks (id -> owner id), rotating each owner's token once"""
+        for owner_id in set(tasks.values()):
+            self._bump(owner_id)
+        self._bump(self.ALL)
+
+    def invalidate_owner(self, owner_id: int) -> None:
+        """Drop everything cached for tasks of an owner (e.g. cascaded deletes)"""
+        self._bump(owner_id)
+        self._bump(self.ALL)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+task_cache = TaskCache(
+    create_cache(
+        namespace="tasks",
+        max_size=settings.cache_max_size,
+        default_ttl=settings.task_cache_ttl_seconds
+    )
+)
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Union
+from ..core.config import settings
+from ..core.metrics import registry
+from ..models.task import Task
+from ..models.user import User, UserRole
+from ..schemas.task import TaskResponse
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+# Sent instead of events a subscriber can no longer be given: refetch, then carry on
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """A committed change to one task; `task` is the TaskResponse JSON (None on delete)"""
+    id: int
+    type: str
+    task_id: Optional[int] = None
+    owner_id: Optional[int] = None
+    task: Optional[Dict[str, Any]] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+
+class EventBroker(ABC):
+    """Numbers events and hands them to every worker's bus (including this one)"""
+
+    # True when publish() goes over the network; async services then publish from the threadpool
+    blocking = False
+
+    @abstractmethod
+    def start(self, deliver: Callable[[TaskEvent], None]) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        ...
+
+
+class MemoryEventBroker(EventBroker):
+    """Single process: ids from a local counter, delivered synchronously"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._deliver: Optional[Callable[[TaskEvent], None]] = None
+
+    def start(self, deliver: Callable[[TaskEvent], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        # Numbered and delivered under one lock so ids reach subscribers in order
+        with self._lock:
+            for fields in events:
+                self._deliver(TaskEvent(id=next(self._ids), **fields))
+
+
+class RedisEventBroker(EventBroker):
+    """Events shared between workers over Redis pub/sub, numbered by INCR
+
+    A stand-in for a real broker: pub/sub keeps nothing, so a worker that is
+    disconnected misses events, and clients resuming there get a RESET.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        channel: str = "task-events",
+        client: Any = None,
+        reconnect_delay: float = 1.0
+    ):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis package is required for the redis task event backend")
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._deliver: Optional[Callable[[TaskEvent], None]] = None
+
+    def start(self, deliver: Callable[[TaskEvent], None]) -> None:
+        self._deliver = deliver
+        threading.Thread(target=self._listen, name="task-events", daemon=True).start()
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        try:
+            last_id = self._client.incrby(f"{self._channel}:id", len(events))
+            pipe = self._client.pipeline(transaction=False)
+            for event_id, fields in enumerate(events, start=last_id - len(events) + 1):
+                pipe.publish(self._channel, TaskEvent(id=event_id, **fields).to_json())
+            pipe.execute()
+        except Exception as exc:
+            # The write already committed; subscribers resync on their next reset
+            logger.warning(f"Task events not published: {exc}")
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    self._deliver(TaskEvent(**json.loads(message["data"])))
+            except Exception as exc:
+                logger.warning(f"Task event subscription lost: {exc}")
+                time.sleep(self.reconnect_delay)
+
+
+class Subscription:
+    """One listener's queue of events it may see, consumed on its own event loop"""
+
+    def __init__(self, bus: "TaskEventBus", user: User, queue_size: int):
+        self.user_id = user.id
+        self.is_admin = user.role == UserRole.ADMIN
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def can_see(self, event: TaskEvent) -> bool:
+        # Same ownership rule as TaskService.get_task
+        return self.is_admin or event.owner_id == self.user_id
+
+    def put(self, event: TaskEvent) -> None:
+        """Queue an event from any thread"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The listener's loop is gone
+            self.close()
+
+    def _put(self, event: TaskEvent) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and tell the client to resync
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(TaskEvent(id=event.id, type=RESET))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[TaskEvent]:
+        """Next event, or None when nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class TaskEventBus:
+    """In-process pub/sub for task changes, with a short history for resuming
+
+    Services publish after their transaction commits. Subscribers receive only
+    events for tasks they could read, and a subscriber that reconnects with the
+    last id it saw is replayed what it missed, as long as that is still in the
+    history; otherwise it gets a RESET event and should refetch its listing.
+    """
+
+    def __init__(self, broker: EventBroker, history_size: int, queue_size: int):
+        self.queue_size = queue_size
+        self._history: Deque[TaskEvent] = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._broker = broker
+        broker.start(self._dispatch)
+
+    def _dispatch(self, event: TaskEvent) -> None:
+        with self._lock:
+            self._history.append(event)
+            subscribers = [subscriber for subscriber in self._subscribers if subscriber.can_see(event)]
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    @property
+    def blocking(self) -> bool:
+        return self._broker.blocking
+
+    def publish(self, event_type: str, tasks: Iterable[Union[Task, TaskResponse]]) -> None:
+        """Announce created or updated tasks (ORM rows still loaded, or their responses)"""
+        events = [
+            {
+                "type": event_type,
+                "task_id": task.id,
+                "owner_id": task.created_by,
+                "task": TaskResponse.model_validate(task).model_dump(mode="json"),
+            }
+            for task in tasks
+        ]
+        if events:
+            self._broker.publish(events)
+
+    def publish_deleted(self, tasks: Dict[int, int]) -> None:
+        """Announce deleted tasks (id -> owner id)"""
+        events = [
+            {"type": DELETED, "task_id": task_id, "owner_id": owner_id}
+            for task_id, owner_id in tasks.items()
+        ]
+        if events:
+            self._broker.publish(events)
+
+    def subscribe(self, user: User, last_event_id: Optional[int] = None) -> Subscription:
+        """Start listening (from the subscriber's event loop), replaying after `last_event_id`"""
+        subscription = Subscription(self, user, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                missed = self._missed(subscription, last_event_id)
+                if missed is None or len(missed) >= self.queue_size:
+                    latest = self._history[-1].id if self._history else 0
+                    missed = [TaskEvent(id=latest, type=RESET)]
+                for event in missed:
+                    subscription._put(event)
+        return subscription
+
+    def _missed(self, subscription: Subscription, last_event_id: int) -> Optional[List[TaskEvent]]:
+        latest = self._history[-1].id if self._history else 0
+        if last_event_id > latest:
+            # An id from before a restart (or another broker): can't tell what was missed
+            return None
+        oldest = self._history[0].id if self._history else latest + 1
+        if last_event_id < oldest - 1:
+            return None
+        return [
+            event for event in self._history
+            if event.id > last_event_id and subscription.can_see(event)
+        ]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._history.clear()
+
+
+def create_event_broker() -> EventBroker:
+    """Build an event broker for the backend selected in settings"""
+    if settings.task_events_backend == "memory":
+        return MemoryEventBroker()
+    if settings.task_events_backend == "redis":
+        return RedisEventBroker(url=settings.task_events_url or settings.cache_url)
+    raise ValueError(f"Unknown task event backend: {settings.task_events_backend}")
+
+
+task_events = TaskEventBus(
+    create_event_broker(),
+    history_size=settings.task_events_history_size,
+    queue_size=settings.task_events_queue_size
+)
+
+registry.register_collector(
+    "task_event_subscribers", "gauge", "Open task event streams (SSE and WebSocket)",
+    lambda: [({}, task_events.subscriber_count)]
+)
@@ -1,45 +1,246 @@
-from typing import Optional, List
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, List, Sequence, Tuple, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    and_, or_, column, delete, insert, inspect, literal_column, select, table, update,
+    Row, Select
+)
+from sqlalchemy.dialects.mysql import match
 from fastapi import HTTPException, status
-from ..models.task import Task
+from ..core.concurrency import call_blocking
+from ..core.database import commit_loaded, supports_returning
+from ..models.task import Task, TaskStatus, SQLITE_FTS_TABLE
 from ..models.user import User, UserRole
-from ..schemas.task import TaskCreate, TaskUpdate
+from ..schemas.task import (
+    TaskCreate, TaskUpdate, TaskFilter, TaskBulkUpdateItem, TaskBulkResult, TaskResponse,
+    TaskStats, TaskChanges
+)
+from .task_cache import task_cache
+from .task_events import task_events, CREATED, UPDATED
+from .task_stats import task_stats, status_deltas
+from .task_sync import task_sync
+
+# TaskResponse fields, in order; listings select just these instead of ORM objects
+TASK_RESPONSE_COLUMNS = tuple(getattr(Task, name) for name in TaskResponse.model_fields)
+
+# Column order of task exports
+EXPORT_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status,
+    Task.created_by, Task.created_at, Task.updated_at,
+)
+
+
+_SORT_COLUMNS = {
+    "id": Task.id,
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+    "title": Task.title,
+    "status": Task.status,
+}
+
+# Keyset cursors seek on the primary key; ids are assigned in creation order,
+# so created_at ordering is served by the id index as well
+_KEYSET_SORTS = {"id": False, "-id": True, "created_at": False, "-created_at": True}
+
+# Search implementation per database URL: "fts5", "fulltext" or "like"
+_search_backends: Dict[str, str] = {}
+
+
+def _search_backend(db: Session) -> str:
+    bind = db.get_bind()
+    key = str(bind.url)
+    backend = _search_backends.get(key)
+    if backend is None:
+        if bind.dialect.name == "sqlite":
+            has_fts = inspect(db.connection()).has_table(SQLITE_FTS_TABLE)
+            backend = "fts5" if has_fts else "like"
+        elif bind.dialect.name in ("mysql", "mariadb"):
+            backend = "fulltext"
+        else:
+            backend = "like"
+        _search_backends[key] = backend
+    return backend
+
+
+def _search_condition(backend: str, text: str) -> Optional[Any]:
+    terms = text.split()
+    if not terms:
+        return None
+    
+    if backend == "fts5":
+        # Every term must match, each as a quoted prefix query
+        expression = " ".join('"%s"*' % term.replace('"', '""') for term in terms)
+        matches = select(column("rowid")).select_from(table(SQLITE_FTS_TABLE)).where(
+            literal_column(SQLITE_FTS_TABLE).op("MATCH")(expression)
+        )
+        return Task.id.in_(matches)
+    
+    if backend == "fulltext":
+        words = [re.sub(r'[+\-<>()~*"@]', "", term) for term in terms]
+        expression = " ".join(f"+{word}*" for word in words if word)
+        if not expression:
+            return None
+        return match(Task.title, Task.description, against=expression).in_boolean_mode()
+    
+    conditions = []
+    for term in terms:
+        pattern = "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+        conditions.append(or_(
+            Task.title.ilike(pattern, escape="\\"),
+            Task.description.ilike(pattern, escape="\\")
+        ))
+    return and_(*conditions)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _filter_conditions(filters: TaskFilter, search_backend: str) -> List[Any]:
+    conditions = []
+    if filters.status is not None:
+        conditions.append(Task.status == filters.status)
+    if filters.created_after is not None:
+        conditions.append(Task.created_at >= _as_utc(filters.created_after))
+    if filters.created_before is not None:
+        conditions.append(Task.created_at < _as_utc(filters.created_before))
+    if filters.updated_after is not None:
+        conditions.append(Task.updated_at >= _as_utc(filters.updated_after))
+    if filters.updated_before is not None:
+        conditions.append(Task.updated_at < _as_utc(filters.updated_before))
+    if filters.q:
+        condition = _search_condition(search_backend, filters.q)
+        if condition is not None:
+            conditions.append(condition)
+    return conditions
+
+
+def _paginate_statement(
+    stmt: Select,
+    skip: int,
+    limit: int,
+    after_id: Optional[int],
+    sort: str = "id",
+    keyset: bool = False
+) -> Select:
+    if keyset or after_id is not None:
+        if sort not in _KEYSET_SORTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination supports sort=id, -id, created_at or -created_at"
+            )
+        # Keyset mode seeks past the last seen id via the (created_by, id) index
+        # instead of scanning and discarding `skip` rows
+        descending = _KEYSET_SORTS[sort]
+        stmt = stmt.order_by(Task.id.desc() if descending else Task.id)
+        if after_id is not None:
+            stmt = stmt.where(Task.id < after_id if descending else Task.id > after_id)
+    else:
+        descending = sort.startswith("-")
+        sort_column = _SORT_COLUMNS[sort.lstrip("-")]
+        # id breaks ties so offset pages stay stable
+        stmt = stmt.order_by(
+            sort_column.desc() if descending else sort_column,
+            Task.id.desc() if descending else Task.id
+        ).offset(skip)
+    return stmt.limit(limit)
+
+
+def _listing_statement(
+    stmt: Select,
+    search_backend: str,
+    skip: int,
+    limit: int,
+    after_id: Optional[int],
+    filters: Optional[TaskFilter],
+    keyset: bool
+) -> Select:
+    sort = "id"
+    if filters is not None:
+        stmt = stmt.where(*_filter_conditions(filters, search_backend))
+        sort = filters.sort
+    return _paginate_statement(stmt, skip, limit, after_id, sort, keyset)
+
+
+def _task_access(task_id: int, current_user: User) -> List[Any]:
+    """WHERE criteria for a task the user may see or modify"""
+    conditions = [Task.id == task_id]
+    # If user is not admin, only allow access to their own tasks
+    if current_user.role != UserRole.ADMIN:
+        conditions.append(Task.created_by == current_user.id)
+    return conditions
+
+
+def _row_statement(stmt: Select) -> Select:
+    # Plain column tuples: no ORM instances, identity map or attribute
+    # instrumentation, and the listing serializer takes them as they are
+    return stmt.with_only_columns(*TASK_RESPONSE_COLUMNS)
+
 
 class TaskService:
-    def get_task(self, db: Session, task_id: int, current_user: User) -> Optional[Task]:
-        query = db.query(Task).filter(Task.id == task_id)
+    def get_task(
+        self, db: Session, task_id: int, current_user: User, lock: bool = False
+    ) -> Optional[Task]:
+        stmt = select(Task).where(*_task_access(task_id, current_user))
         
-        # If user is not admin, only allow access to their own tasks
-        if current_user.role != UserRole.ADMIN:
-            query = query.filter(Task.created_by == current_user.id)
+        # Writers lock the row so the status counters see the status they replace
+        if lock:
+            stmt = stmt.with_for_update().execution_options(populate_existing=True)
         
-        return query.first()
+        # Primary only: the result fills task_cache, and a lagging replica would
+        # put back the row a write just invalidated
+        return db.scalars(stmt).first()
     
     def get_tasks(
         self, 
         db: Session, 
         current_user: User,
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[Task]:
-        query = db.query(Task)
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[TaskFilter] = None,
+        keyset: bool = False,
+        as_rows: bool = False
+    ) -> Union[List[Task], List[Row]]:
+        stmt = select(Task)
         
         # If user is not admin, only show their own tasks
         if current_user.role != UserRole.ADMIN:
-            query = query.filter(Task.created_by == current_user.id)
+            stmt = stmt.where(Task.created_by == current_user.id)
         
-        return query.offset(skip).limit(limit).all()
+        stmt = _listing_statement(
+            stmt, _search_backend(db), skip, limit, after_id, filters, keyset
+        )
+        # From the primary, like get_task: listings fill task_cache too
+        if as_rows:
+            return list(db.execute(_row_statement(stmt)))
+        return list(db.scalars(stmt))
     
     def create_task(self, db: Session, task: TaskCreate, current_user: User) -> Task:
-        db_task = Task(
-            **task.model_dump(),
-            created_by=current_user.id
-        )
+        values = {**task.model_dump(), "created_by": current_user.id}
+        # Taken first: the owner's version counter lock is what orders their task writes
+        values["version"] = task_sync.claim_version(db, current_user.id)
+        returning = supports_returning(db, "insert")
+        if returning:
+            # The id and server defaults come back with the INSERT itself
+            db_task = db.scalar(insert(Task).values(**values).returning(Task))
+        else:
+            db_task = Task(**values)
+            db.add(db_task)
         
-        db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+        task_stats.apply(db, status_deltas(added=[(current_user.id, db_task.status)]))
+        if returning:
+            commit_loaded(db, db_task)
+        else:
+            db.commit()
+            db.refresh(db_task)
+        task_cache.invalidate(db_task.id, db_task.created_by)
+        task_events.publish(CREATED, [db_task])
         return db_task
     
     def update_task(
@@ -49,46 +250,423 @@ class TaskService:
         task_update: TaskUpdate,
         current_user: User
     ) -> Optional[Task]:
-        db_task = self.get_task(db, task_id, current_user)
-        if not db_task:
-            return None
-        
         update_data = task_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return self.get_task(db, task_id, current_user)
+        update_data["version"] = task_sync.claim_for_task(db, task_id, current_user)
+        if update_data["version"] is None:
+            return None
         
-        for field, value in update_data.items():
-            setattr(db_task, field, value)
+        returning = supports_returning(db, "update")
+        if returning:
+            access = _task_access(task_id, current_user)
+            previous_status = None
+            if "status" in update_data:
+                # The counters need the status being replaced, read under the row lock
+                previous_status = db.scalar(select(Task.status).where(*access).with_for_update())
+                if previous_status is None:
+                    return None
+            # Ownership check, write and reload in a single statement
+            db_task = db.scalar(update(Task).where(*access).values(**update_data).returning(Task))
+        else:
+            db_task = self.get_task(db, task_id, current_user, lock=True)
+            if db_task:
+                previous_status = db_task.status
+                for field, value in update_data.items():
+                    setattr(db_task, field, value)
+        if not db_task:
+            return None
         
-        db.commit()
-        db.refresh(db_task)
+        if "status" in update_data:
+            task_stats.apply(db, status_deltas(
+                added=[(db_task.created_by, db_task.status)],
+                removed=[(db_task.created_by, previous_status)]
+            ))
+        if returning:
+            commit_loaded(db, db_task)
+        else:
+            db.commit()
+            db.refresh(db_task)
+        task_cache.invalidate(db_task.id, db_task.created_by)
+        task_events.publish(UPDATED, [db_task])
         return db_task
     
     def delete_task(self, db: Session, task_id: int, current_user: User) -> bool:
-        db_task = self.get_task(db, task_id, current_user)
+        version = task_sync.claim_for_task(db, task_id, current_user)
+        if version is None:
+            return False
+        db_task = self.get_task(db, task_id, current_user, lock=True)
         if not db_task:
             return False
         
+        owner_id = db_task.created_by
+        task_stats.apply(db, status_deltas(removed=[(owner_id, db_task.status)]))
+        task_sync.record_deletions(db, [(task_id, owner_id, version)])
         db.delete(db_task)
         db.commit()
+        task_cache.invalidate(task_id, owner_id)
+        task_events.publish_deleted({task_id: owner_id})
         return True
     
+    def bulk_create_tasks(
+        self,
+        db: Session,
+        tasks: List[TaskCreate],
+        current_user: User
+    ) -> List[TaskBulkResult]:
+        versions = task_sync.claim_versions(db, {current_user.id: len(tasks)})[current_user.id]
+        rows = [
+            {**task.model_dump(), "created_by": current_user.id, "version": next(versions)}
+            for task in tasks
+        ]
+        
+        if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            # One batched INSERT ... RETURNING for the whole request
+            created = list(db.scalars(
+                insert(Task).returning(Task, sort_by_parameter_order=True), rows
+            ))
+        else:
+            created = [Task(**row) for row in rows]
+            db.add_all(created)
+            db.flush()
+            # Load server defaults (created_at) for all rows in one SELECT
+            created_ids = [task.id for task in created]
+            db.scalars(
+                select(Task).where(Task.id.in_(created_ids)).execution_options(populate_existing=True)
+            ).all()
+        
+        results = [
+            TaskBulkResult(index=index, id=task.id, status="created", task=TaskResponse.model_validate(task))
+            for index, task in enumerate(created)
+        ]
+        task_stats.apply(db, status_deltas(added=[(task.created_by, task.status) for task in created]))
+        db.commit()
+        task_cache.invalidate_many({task.id: current_user.id for task in created})
+        # The committed rows are expired; the responses built above carry the same data
+        task_events.publish(CREATED, [result.task for result in results])
+        return results
+    
+    def bulk_update_tasks(
+        self,
+        db: Session,
+        items: List[TaskBulkUpdateItem],
+        current_user: User
+    ) -> List[TaskBulkResult]:
+        # One version per item at most; unused ones are simply skipped
+        versions = task_sync.claim_for_tasks(db, [item.id for item in items], current_user)
+        owned = self._owned_tasks(db, [item.id for item in items], current_user)
+        owners = {task_id: owner_id for task_id, (owner_id, _) in owned.items()}
+        
+        rows = [
+            {"id": item.id, **item.model_dump(exclude_unset=True, exclude={"id"})}
+            for item in items
+            if item.id in owners
+        ]
+        rows = [
+            {**row, "version": next(versions[owners[row["id"]]])}
+            for row in rows
+            if len(row) > 1
+        ]
+        if rows:
+            # ORM bulk UPDATE by primary key: executemany grouped by column set
+            db.execute(update(Task), rows)
+        
+        reloaded = list(db.scalars(
+            select(Task).where(Task.id.in_(owners)).execution_options(populate_existing=True)
+        ))
+        updated = {task.id: TaskResponse.model_validate(task) for task in reloaded}
+        task_stats.apply(db, status_deltas(
+            added=[(task.created_by, task.status) for task in reloaded],
+            removed=owned.values()
+        ))
+        db.commit()
+        task_cache.invalidate_many(owners)
+        task_events.publish(UPDATED, updated.values())
+        
+        return [
+            TaskBulkResult(index=index, id=item.id, status="updated", task=updated[item.id])
+            if item.id in updated
+            else TaskBulkResult(index=index, id=item.id, status="not_found")
+            for index, item in enumerate(items)
+        ]
+    
+    def bulk_delete_tasks(
+        self,
+        db: Session,
+        task_ids: List[int],
+        current_user: User
+    ) -> List[TaskBulkResult]:
+        versions = task_sync.claim_for_tasks(db, task_ids, current_user)
+        owned = self._owned_tasks(db, task_ids, current_user)
+        owners = {task_id: owner_id for task_id, (owner_id, _) in owned.items()}
+        if owners:
+            db.execute(
+                delete(Task).where(Task.id.in_(owners)).execution_options(synchronize_session=False)
+            )
+            task_stats.apply(db, status_deltas(removed=owned.values()))
+            task_sync.record_deletions(db, [
+                (task_id, owner_id, next(versions[owner_id])) for task_id, owner_id in owners.items()
+            ])
+        db.commit()
+        task_cache.invalidate_many(owners)
+        task_events.publish_deleted(owners)
+        
+        results = []
+        seen = set()
+        for index, task_id in enumerate(task_ids):
+            deleted = task_id in owners and task_id not in seen
+            seen.add(task_id)
+            results.append(
+                TaskBulkResult(index=index, id=task_id, status="deleted" if deleted else "not_found")
+            )
+        return results
+    
+    def iter_export_batches(
+        self,
+        db: Session,
+        current_user: User,
+        batch_size: int = 1000
+    ) -> Iterator[Sequence[Row]]:
+        """Yield batches of task column tuples using a server-side cursor
+        
+        Owns the session from here on: it is closed once the stream is exhausted
+        or abandoned, since the response outlives the request dependencies.
+        """
+        stmt = select(*EXPORT_COLUMNS).order_by(Task.id)
+        if current_user.role != UserRole.ADMIN:
+            stmt = stmt.where(Task.created_by == current_user.id)
+        
+        try:
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            yield from result.partitions()
+        finally:
+            db.close()
+    
+    def _owned_tasks(
+        self, db: Session, task_ids: List[int], current_user: User
+    ) -> Dict[int, Tuple[int, TaskStatus]]:
+        """Map the given ids the user may modify to (owner, status), locking the rows
+
+        Same visibility rule as get_task.
+        """
+        stmt = select(Task.id, Task.created_by, Task.status).where(Task.id.in_(set(task_ids)))
+        if current_user.role != UserRole.ADMIN:
+            stmt = stmt.where(Task.created_by == current_user.id)
+        stmt = stmt.with_for_update()
+        return {task_id: (owner_id, task_status) for task_id, owner_id, task_status in db.execute(stmt)}
+    
     def get_user_tasks(
         self, 
         db: Session, 
         user_id: int, 
         current_user: User,
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[Task]:
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[TaskFilter] = None,
+        keyset: bool = False,
+        as_rows: bool = False
+    ) -> Union[List[Task], List[Row]]:
+        self.ensure_can_view_user_tasks(user_id, current_user)
+        
+        stmt = _listing_statement(
+            select(Task).where(Task.created_by == user_id),
+            _search_backend(db), skip, limit, after_id, filters, keyset
+        )
+        # From the primary, like get_task: listings fill task_cache too
+        if as_rows:
+            return list(db.execute(_row_statement(stmt)))
+        return list(db.scalars(stmt))
+
+    def get_stats(
+        self, db: Session, current_user: User, user_id: Optional[int] = None
+    ) -> TaskStats:
+        """Status counts for one user; admins get global figures unless user_id is given"""
+        return task_stats.get_stats(db, self.stats_scope(current_user, user_id))
+
+    def get_changes(
+        self, db: Session, current_user: User, since: Optional[str] = None, limit: int = 500
+    ) -> TaskChanges:
+        """Tasks the user can see that changed after a sync token (see TaskSyncService)"""
+        return task_sync.get_changes(db, current_user, since, limit)
+
+    def stats_scope(self, current_user: User, user_id: Optional[int]) -> Optional[int]:
+        if user_id is not None:
+            self.ensure_can_view_user_tasks(user_id, current_user)
+            return user_id
+        return None if current_user.role == UserRole.ADMIN else current_user.id
+
+    def ensure_can_view_user_tasks(self, user_id: int, current_user: User) -> None:
         # Only admins can view other users' tasks
         if current_user.role != UserRole.ADMIN and current_user.id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions to view these tasks"
             )
+
+
+class AsyncTaskService:
+    """TaskService counterpart for AsyncSession-backed routes"""
+
+    async def get_task(
+        self, db: AsyncSession, task_id: int, current_user: User, lock: bool = False
+    ) -> Optional[Task]:
+        stmt = select(Task).where(*_task_access(task_id, current_user))
+        
+        if lock:
+            stmt = stmt.with_for_update().execution_options(populate_existing=True)
+        
+        return (await db.scalars(stmt)).first()
+    
+    async def get_tasks(
+        self,
+        db: AsyncSession,
+        current_user: User,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[TaskFilter] = None,
+        keyset: bool = False,
+        as_rows: bool = False
+    ) -> Union[List[Task], List[Row]]:
+        stmt = select(Task)
+        
+        # If user is not admin, only show their own tasks
+        if current_user.role != UserRole.ADMIN:
+            stmt = stmt.where(Task.created_by == current_user.id)
+        
+        stmt = _listing_statement(
+            stmt, await db.run_sync(_search_backend), skip, limit, after_id, filters, keyset
+        )
+        if as_rows:
+            return list(await db.execute(_row_statement(stmt)))
+        return list(await db.scalars(stmt))
+    
+    async def create_task(self, db: AsyncSession, task: TaskCreate, current_user: User) -> Task:
+        values = {**task.model_dump(), "created_by": current_user.id}
+        values["version"] = await db.run_sync(task_sync.claim_version, current_user.id)
+        returning = supports_returning(db, "insert")
+        if returning:
+            db_task = await db.scalar(insert(Task).values(**values).returning(Task))
+        else:
+            db_task = Task(**values)
+            db.add(db_task)
+        
+        await db.run_sync(
+            task_stats.apply, status_deltas(added=[(current_user.id, db_task.status)])
+        )
+        # Async sessions don't expire on commit, so RETURNING's state stays loaded
+        await db.commit()
+        if not returning:
+            await db.refresh(db_task)
+        await call_blocking(
+            task_cache.blocking, task_cache.invalidate, db_task.id, db_task.created_by
+        )
+        await call_blocking(task_events.blocking, task_events.publish, CREATED, [db_task])
+        return db_task
+    
+    async def update_task(
+        self,
+        db: AsyncSession,
+        task_id: int,
+        task_update: TaskUpdate,
+        current_user: User
+    ) -> Optional[Task]:
+        update_data = task_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return await self.get_task(db, task_id, current_user)
+        update_data["version"] = await db.run_sync(task_sync.claim_for_task, task_id, current_user)
+        if update_data["version"] is None:
+            return None
+        
+        returning = supports_returning(db, "update")
+        if returning:
+            access = _task_access(task_id, current_user)
+            previous_status = None
+            if "status" in update_data:
+                previous_status = await db.scalar(
+                    select(Task.status).where(*access).with_for_update()
+                )
+                if previous_status is None:
+                    return None
+            db_task = await db.scalar(
+                update(Task).where(*access).values(**update_data).returning(Task)
+            )
+        else:
+            db_task = await self.get_task(db, task_id, current_user, lock=True)
+            if db_task:
+                previous_status = db_task.status
+                for field, value in update_data.items():
+                    setattr(db_task, field, value)
+        if not db_task:
+            return None
         
-        return db.query(Task).filter(
-            Task.created_by == user_id
-        ).offset(skip).limit(limit).all()
+        if "status" in update_data:
+            await db.run_sync(task_stats.apply, status_deltas(
+                added=[(db_task.created_by, db_task.status)],
+                removed=[(db_task.created_by, previous_status)]
+            ))
+        await db.commit()
+        if not returning:
+            await db.refresh(db_task)
+        await call_blocking(
+            task_cache.blocking, task_cache.invalidate, db_task.id, db_task.created_by
+        )
+        await call_blocking(task_events.blocking, task_events.publish, UPDATED, [db_task])
+        return db_task
+    
+    async def delete_task(self, db: AsyncSession, task_id: int, current_user: User) -> bool:
+        version = await db.run_sync(task_sync.claim_for_task, task_id, current_user)
+        if version is None:
+            return False
+        db_task = await self.get_task(db, task_id, current_user, lock=True)
+        if not db_task:
+            return False
+        
+        owner_id = db_task.created_by
+        await db.run_sync(
+            task_stats.apply, status_deltas(removed=[(owner_id, db_task.status)])
+        )
+        await db.run_sync(task_sync.record_deletions, [(task_id, owner_id, version)])
+        await db.delete(db_task)
+        await db.commit()
+        await call_blocking(task_cache.blocking, task_cache.invalidate, task_id, owner_id)
+        await call_blocking(task_events.blocking, task_events.publish_deleted, {task_id: owner_id})
+        return True
+    
+    async def get_user_tasks(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        current_user: User,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[TaskFilter] = None,
+        keyset: bool = False,
+        as_rows: bool = False
+    ) -> Union[List[Task], List[Row]]:
+        task_service.ensure_can_view_user_tasks(user_id, current_user)
+        
+        stmt = _listing_statement(
+            select(Task).where(Task.created_by == user_id),
+            await db.run_sync(_search_backend), skip, limit, after_id, filters, keyset
+        )
+        if as_rows:
+            return list(await db.execute(_row_statement(stmt)))
+        return list(await db.scalars(stmt))
+    
+    async def get_stats(
+        self, db: AsyncSession, current_user: User, user_id: Optional[int] = None
+    ) -> TaskStats:
+        scope = task_service.stats_scope(current_user, user_id)
+        return await db.run_sync(task_stats.get_stats, scope)
+    
+    async def get_changes(
+        self, db: AsyncSession, current_user: User, since: Optional[str] = None, limit: int = 500
+    ) -> TaskChanges:
+        return await db.run_sync(task_sync.get_changes, current_user, since, limit)
 
 
-task_service = TaskService()
\ No newline at end of file
+task_service = TaskService()
+async_task_service = AsyncTaskService()
\ No newline at end of file
@@ -0,0 +1,107 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.task import Task, TaskStatus
+from ..models.task_stats import TaskStatusCount
+from ..schemas.task import TaskStats
+
+# (owner id, status) -> change in the number of tasks
+StatusDeltas = Dict[Tuple[int, TaskStatus], int]
+
+_counts = TaskStatusCount.__table__
+
+
+def status_deltas(
+    added: Iterable[Tuple[int, TaskStatus]] = (),
+    removed: Iterable[Tuple[int, TaskStatus]] = ()
+) -> StatusDeltas:
+    """Net counter changes for tasks entering and leaving (owner, status) buckets"""
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    return {bucket: delta for bucket, delta in deltas.items() if delta}
+
+
+class TaskStatsService:
+    """Per-owner status counters, so stats never need a COUNT(*) over tasks
+
+    Deltas are applied inside the caller's transaction, so the counters commit
+    or roll back together with the task rows they describe.
+    """
+
+    def apply(self, db: Session, deltas: StatusDeltas) -> None:
+        rows = [
+            {"user_id": user_id, "status": task_status, "count": delta}
+            for (user_id, task_status), delta in deltas.items()
+            if delta
+        ]
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            upsert = (sqlite if dialect == "sqlite" else postgresql).insert(_counts)
+            db.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=[_counts.c.user_id, _counts.c.status],
+                    set_={"count": _counts.c.count + upsert.excluded.count}
+                ),
+                rows
+            )
+        elif dialect in ("mysql", "mariadb"):
+            upsert = mysql.insert(_counts)
+            db.execute(
+                upsert.on_duplicate_key_update(count=_counts.c.count + upsert.inserted.count),
+                rows
+            )
+        else:
+            for row in rows:
+                result = db.execute(
+                    update(_counts)
+                    .where(_counts.c.user_id == row["user_id"], _counts.c.status == row["status"])
+                    .values(count=_counts.c.count + row["count"])
+                )
+                if result.rowcount == 0:
+                    db.execute(insert(_counts), row)
+
+    def get_stats(self, db: Session, user_id: Optional[int] = None) -> TaskStats:
+        """Counts per status for one owner, or across all owners when user_id is None"""
+        stmt = select(_counts.c.status, func.sum(_counts.c.count)).group_by(_counts.c.status)
+        if user_id is not None:
+            stmt = stmt.where(_counts.c.user_id == user_id)
+
+        counts = {task_status: 0 for task_status in TaskStatus}
+        counts.update({task_status: int(total) for task_status, total in db.execute(stmt)})
+        total = sum(counts.values())
+        completed = counts[TaskStatus.COMPLETED]
+        return TaskStats(
+            user_id=user_id,
+            total=total,
+            counts=counts,
+            completion_rate=completed / total if total else 0.0
+        )
+
+    def clear_user(self, db: Session, user_id: int) -> None:
+        db.execute(delete(_counts).where(_counts.c.user_id == user_id))
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every counter from the tasks table; returns the number of rows written
+
+        Writes committed while this runs may be missed, so run it when the
+        counters are known to have drifted, ideally with writes paused.
+        """
+        db.execute(delete(_counts))
+        result = db.execute(
+            insert(_counts).from_select(
+                ["user_id", "status", "count"],
+                select(Task.created_by, Task.status, func.count()).group_by(
+                    Task.created_by, Task.status
+                )
+            )
+        )
+        db.commit()
+        return result.rowcount
+
+
+task_stats = TaskStatsService()
@@ -0,0 +1,268 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import Row, and_, bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from ..core.database import REPLICA_READ, supports_returning
+from ..models.task import Task
+from ..models.task_sync import TaskTombstone, TaskVersionCounter
+from ..models.user import User, UserRole
+from ..schemas.task import TaskChanges, TaskResponse
+from ..utils.pagination import CursorUtils
+from .task_cache import TASK_FIELDS
+
+_counters = TaskVersionCounter.__table__
+_tombstones = TaskTombstone.__table__
+
+_CHANGE_COLUMNS = tuple(getattr(Task, name) for name in TASK_FIELDS) + (Task.version,)
+
+# owner id -> (last version the client has, owner's counter when the client first saw them)
+SyncPositions = Dict[int, Tuple[int, int]]
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def encode_sync_token(positions: SyncPositions) -> str:
+    owners = [[owner_id, version, base] for owner_id, (version, base) in sorted(positions.items())]
+    return CursorUtils.encode_cursor({"owners": owners})
+
+
+def decode_sync_token(token: str) -> SyncPositions:
+    owners = CursorUtils.decode_cursor(token).get("owners")
+    if not isinstance(owners, list) or not all(
+        isinstance(entry, list) and len(entry) == 3 and all(_is_int(value) for value in entry)
+        for entry in owners
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    return {owner_id: (version, base) for owner_id, version, base in owners}
+
+
+class TaskSyncService:
+    """Versions and tombstones behind GET /tasks/changes
+
+    Every task write takes its versions from its owner's counter row, bumped
+    first in the writing transaction. The row lock orders writes to one
+    owner's tasks (and only those), so an owner's versions become visible in
+    increasing order and a client that has seen version N of an owner has seen
+    all of that owner's changes up to N. Deletions leave a tombstone with
+    their version.
+    """
+
+    def claim_versions(self, db: Session, counts: Dict[int, int]) -> Dict[int, Iterator[int]]:
+        """Reserve consecutive versions per owner (owner id -> how many), handed out in order
+
+        Counters are locked in owner order, so admin writes spanning several
+        owners can't deadlock each other.
+        """
+        claimed = {}
+        for owner_id in sorted(counts):
+            count = counts[owner_id]
+            last = self._bump(db, owner_id, count)
+            claimed[owner_id] = iter(range(last - count + 1, last + 1))
+        return claimed
+
+    def claim_version(self, db: Session, owner_id: int) -> int:
+        return next(self.claim_versions(db, {owner_id: 1})[owner_id])
+
+    def claim_for_tasks(
+        self, db: Session, task_ids: List[int], current_user: User
+    ) -> Dict[int, Iterator[int]]:
+        """Versions for writing existing tasks: one per id, under each task's owner
+
+        Users only write their own tasks; admins need the owners looked up
+        first, unlocked, so counters are still locked before any task row.
+        Ids that turn out not to be writable just leave unused versions.
+        """
+        if current_user.role != UserRole.ADMIN:
+            return self.claim_versions(db, {current_user.id: len(task_ids)})
+        owners = dict(db.execute(
+            select(Task.id, Task.created_by).where(Task.id.in_(set(task_ids)))
+        ).all())
+        return self.claim_versions(
+            db, Counter(owners[task_id] for task_id in task_ids if task_id in owners)
+        )
+
+    def claim_for_task(self, db: Session, task_id: int, current_user: User) -> Optional[int]:
+        """Version for writing one task; None when an admin names a task that doesn't exist"""
+        versions = self.claim_for_tasks(db, [task_id], current_user)
+        return next(next(iter(versions.values()))) if versions else None
+
+    def _bump(self, db: Session, owner_id: int, count: int) -> int:
+        # An upsert, like the status counters, so an owner's first write creates the row
+        row = {"owner_id": owner_id, "version": count, "pruned_through": 0}
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            upsert = (sqlite if dialect == "sqlite" else postgresql).insert(_counters).values(**row)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[_counters.c.owner_id],
+                set_={"version": _counters.c.version + upsert.excluded.version}
+            )
+            if supports_returning(db, "insert"):
+                return db.scalar(upsert.returning(_counters.c.version))
+            db.execute(upsert)
+        elif dialect in ("mysql", "mariadb"):
+            upsert = mysql.insert(_counters).values(**row)
+            db.execute(
+                upsert.on_duplicate_key_update(version=_counters.c.version + upsert.inserted.version)
+            )
+        else:
+            result = db.execute(
+                update(_counters)
+                .where(_counters.c.owner_id == owner_id)
+                .values(version=_counters.c.version + count)
+            )
+            if result.rowcount == 0:
+                db.execute(insert(_counters).values(**row))
+        return db.scalar(select(_counters.c.version).where(_counters.c.owner_id == owner_id))
+
+    def record_deletions(self, db: Session, deletions: Iterable[Tuple[int, int, int]]) -> None:
+        """Tombstones for deleted tasks, given as (task id, owner id, version)"""
+        rows = [
+            {"task_id": task_id, "owner_id": owner_id, "version": version}
+            for task_id, owner_id, version in deletions
+        ]
+        if rows:
+            db.execute(insert(_tombstones), rows)
+
+    def record_owner_deletion(self, db: Session, owner_id: int) -> None:
+        """Tombstones for every task of a user about to be deleted (cascade)"""
+        # Lock the owner's counter first, so none of their tasks is written meanwhile
+        self.claim_versions(db, {owner_id: 0})
+        task_ids = list(db.scalars(select(Task.id).where(Task.created_by == owner_id)))
+        if task_ids:
+            versions = self.claim_versions(db, {owner_id: len(task_ids)})[owner_id]
+            self.record_deletions(db, [(task_id, owner_id, next(versions)) for task_id in task_ids])
+
+    def get_changes(
+        self, db: Session, current_user: User, since: Optional[str], limit: int
+    ) -> TaskChanges:
+        """Tasks written and ids deleted after a sync token, in each owner's write order
+
+        The token keeps a position per owner the client has seen. Owners it
+        hasn't seen yet (every owner, without a token) are sent whole, so a
+        first sync is a snapshot paged like any other changes. Deletions from
+        before the client first saw an owner are never sent, and positions only
+        advance past versions a response contains, so any replica can serve it.
+        """
+        positions = decode_sync_token(since) if since is not None else {}
+        is_admin = current_user.role == UserRole.ADMIN
+        if not is_admin:
+            positions = {
+                owner_id: position for owner_id, position in positions.items()
+                if owner_id == current_user.id
+            }
+
+        counters = {}
+        if positions:
+            counters = {
+                row.owner_id: row for row in db.execute(
+                    select(_counters.c.owner_id, _counters.c.version, _counters.c.pruned_through)
+                    .where(_counters.c.owner_id.in_(positions)),
+                    bind_arguments=REPLICA_READ
+                )
+            }
+        for owner_id, (version, base) in positions.items():
+            counter = counters.get(owner_id)
+            if counter is not None and max(version, base) < counter.pruned_through:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Sync token has expired, start again without one"
+                )
+        # Known owners with writes after the client's position
+        changed = [
+            owner_id for owner_id, (version, _) in positions.items()
+            if owner_id in counters and counters[owner_id].version > version
+        ]
+
+        rows: List[Row] = []
+        if is_admin or current_user.id not in positions or changed:
+            task_stmt = (
+                select(*_CHANGE_COLUMNS, func.coalesce(_counters.c.version, 0).label("base"))
+                .outerjoin(_counters, _counters.c.owner_id == Task.created_by)
+                .where(or_(
+                    Task.created_by.notin_(positions),
+                    *(
+                        and_(Task.created_by == owner_id, Task.version > positions[owner_id][0])
+                        for owner_id in changed
+                    )
+                ))
+                .order_by(Task.created_by, Task.version)
+                .limit(limit + 1)
+            )
+            if not is_admin:
+                task_stmt = task_stmt.where(Task.created_by == current_user.id)
+            # The counter is read in the same statement as the rows, so it describes the same state
+            rows = list(db.execute(task_stmt, bind_arguments=REPLICA_READ))
+        tombstones = []
+        if changed:
+            tombstones = list(db.execute(
+                select(_tombstones.c.owner_id, _tombstones.c.version, _tombstones.c.task_id)
+                .where(or_(*(
+                    and_(
+                        _tombstones.c.owner_id == owner_id,
+                        _tombstones.c.version > max(positions[owner_id])
+                    )
+                    for owner_id in changed
+                )))
+                .order_by(_tombstones.c.owner_id, _tombstones.c.version)
+                .limit(limit + 1),
+                bind_arguments=REPLICA_READ
+            ))
+
+        changes: List[Tuple[int, int, int, Optional[Row]]] = [
+            (row.created_by, row.version, row.id, row) for row in rows
+        ]
+        changes.extend((owner_id, version, task_id, None) for owner_id, version, task_id in tombstones)
+        changes.sort(key=lambda change: change[:2])
+        page = changes[:limit]
+
+        # Only a task's latest change in the page counts: written then deleted is just deleted
+        latest: Dict[Tuple[int, int], Optional[Row]] = {}
+        for owner_id, version, task_id, row in page:
+            latest[owner_id, task_id] = row
+            base = positions[owner_id][1] if owner_id in positions else row.base
+            positions[owner_id] = (version, base)
+        return TaskChanges(
+            tasks=[
+                TaskResponse(**dict(zip(TASK_FIELDS, row))) for row in latest.values() if row is not None
+            ],
+            deleted=[task_id for (_, task_id), row in latest.items() if row is None],
+            next_since=encode_sync_token(positions),
+            has_more=len(changes) > limit
+        )
+
+    def prune_tombstones(self, db: Session, older_than: datetime) -> int:
+        """Drop tombstones deleted before `older_than`; returns how many
+
+        Sync positions older than an owner's newest pruned tombstone are
+        rejected with 410 from then on, since deletions they may need are gone.
+        """
+        newest = db.execute(
+            select(_tombstones.c.owner_id, func.max(_tombstones.c.version))
+            .where(_tombstones.c.deleted_at < older_than)
+            .group_by(_tombstones.c.owner_id)
+        ).all()
+        if not newest:
+            return 0
+        result = db.execute(delete(_tombstones).where(_tombstones.c.deleted_at < older_than))
+        db.execute(
+            update(_counters)
+            .where(
+                _counters.c.owner_id == bindparam("owner"),
+                _counters.c.pruned_through < bindparam("newest")
+            )
+            .values(pruned_through=bindparam("newest")),
+            [{"owner": owner_id, "newest": version} for owner_id, version in newest]
+        )
+        db.commit()
+        return result.rowcount
+
+
+task_sync = TaskSyncService()
@@ -1,10 +1,89 @@
+import re
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import case, insert, or_, select, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from ..models.user import User
+from ..models.user import User, UserRole
 from ..schemas.user import UserCreate, UserUpdate
+from ..core.concurrency import call_blocking
+from ..core.database import REPLICA_READ, commit_loaded, supports_returning
 from ..core.security import security
+from ..core.cache import principal_cache
+from .identity_filter import identity_filter
+from .task_cache import task_cache
+from .task_stats import task_stats
+from .task_sync import task_sync
+
+# Columns kept for cached principals; the password hash never leaves the database
+PRINCIPAL_FIELDS = ("id", "username", "email", "role", "is_active", "created_at", "updated_at")
+
+
+def _principal_snapshot(user: User) -> dict:
+    # JSON types only, so any cache backend can store it
+    snapshot = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    snapshot["role"] = user.role.value
+    for field in ("created_at", "updated_at"):
+        if snapshot[field] is not None:
+            snapshot[field] = snapshot[field].isoformat()
+    return snapshot
+
+
+def _principal_from_snapshot(snapshot: dict) -> User:
+    # Detached copy: safe to share across sessions and threads
+    values = dict(snapshot, role=UserRole(snapshot["role"]))
+    for field in ("created_at", "updated_at"):
+        if values[field] is not None:
+            values[field] = datetime.fromisoformat(values[field])
+    return User(**values)
+
+
+_DUPLICATE_DETAIL = {
+    "username": "Username already registered",
+    "email": "Email already registered",
+}
+
+# Unique violations name the column (SQLite) or the index (MySQL, PostgreSQL)
+_DUPLICATE_FIELD = re.compile(r"(?:users\.|ix_users_)(username|email)\b")
+
+
+def _duplicate_field(exc: IntegrityError) -> Optional[str]:
+    """Which unique column an IntegrityError is about, when the message says so"""
+    fields = set(_DUPLICATE_FIELD.findall(str(exc.orig)))
+    return fields.pop() if len(fields) == 1 else None
+
+
+def _duplicate_error(field: Optional[str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=_DUPLICATE_DETAIL.get(field, "Username or email already exists")
+    )
+
+
+def _taken_statement(username: str, email: str):
+    # Both unique columns in one round trip
+    return select(User.username, User.email).where(
+        or_(User.username == username, User.email == email)
+    )
+
+
+def _taken_field(rows, username: str) -> Optional[str]:
+    if not rows:
+        return None
+    # Reported in the order the separate checks used to run
+    return "username" if any(row.username == username for row in rows) else "email"
+
+
+def _login_statement(username_or_email: str):
+    # A username match wins over another account's email
+    return (
+        select(User)
+        .where(or_(User.username == username_or_email, User.email == username_or_email))
+        .order_by(case((User.username == username_or_email, 0), else_=1))
+        .limit(1)
+    )
 
 class UserService:
     def get_user(self, db: Session, user_id: int) -> Optional[User]:
@@ -16,70 +95,245 @@ class UserService:
     def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
     
+    def get_user_by_login(self, db: Session, username_or_email: str) -> Optional[User]:
+        return db.scalar(_login_statement(username_or_email))
+    
+    def get_principal(self, db: Session, username: str) -> Optional[User]:
+        """Resolve an authenticated user, served from the principal cache when fresh"""
+        snapshot = principal_cache.get(username)
+        if snapshot is not None:
+            return _principal_from_snapshot(snapshot)
+        
+        # From the primary: a lagging replica would cache the role or active
+        # flag an update just changed
+        user = db.scalar(select(User).where(User.username == username))
+        if user is not None:
+            principal_cache.set(username, _principal_snapshot(user))
+            # Detached like the cached copies
+            db.expunge(user)
+        return user
+    
     def get_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-        return db.query(User).offset(skip).limit(limit).all()
+        return list(db.scalars(select(User).offset(skip).limit(limit), bind_arguments=REPLICA_READ))
     
     def create_user(self, db: Session, user: UserCreate) -> User:
-        # Check if username or email already exists
-        if self.get_user_by_username(db, user.username):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already registered"
-            )
-        
-        if self.get_user_by_email(db, user.email):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
+        # Names the filter has never seen skip the duplicate probe
+        if identity_filter.might_exist(user.username, user.email):
+            rows = db.execute(_taken_statement(user.username, user.email)).all()
+            field = _taken_field(rows, user.username)
+            if field:
+                raise _duplicate_error(field)
         
-        hashed_password = security.get_password_hash(user.password)
-        db_user = User(
-            username=user.username,
-            email=user.email,
-            hashed_password=hashed_password,
-            role=user.role
-        )
+        values = {
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": security.get_password_hash(user.password),
+            "role": user.role,
+        }
 
         try:
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-        except IntegrityError:
+            if supports_returning(db, "insert"):
+                # The id and server defaults come back with the INSERT itself
+                db_user = db.scalar(insert(User).values(**values).returning(User))
+                commit_loaded(db, db_user)
+            else:
+                db_user = User(**values)
+                db.add(db_user)
+                db.commit()
+                db.refresh(db_user)
+        except IntegrityError as exc:
+            # Taken by a concurrent registration, or one the filter hasn't seen:
+            # the unique indexes are the final word
             db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username or email already exists"
-            )
+            field = _duplicate_field(exc)
+            if field is None:
+                rows = db.execute(_taken_statement(user.username, user.email)).all()
+                field = _taken_field(rows, user.username)
+            raise _duplicate_error(field)
         
-    def update_user(self, db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
-        db_user = self.get_user(db, user_id)
-        if not db_user:
-            return None
+        identity_filter.add(db_user.username, db_user.email)
+        return db_user
         
+    def update_user(self, db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
         update_data = user_update.model_dump(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        returning = bool(update_data) and supports_returning(db, "update")
+        if returning:
+            previous_username = None
+            if "username" in update_data:
+                # Cached principals are keyed by the name being replaced
+                previous_username = db.scalar(select(User.username).where(User.id == user_id))
+                if previous_username is None:
+                    return None
+        else:
+            db_user = self.get_user(db, user_id)
+            if not db_user:
+                return None
+            previous_username = db_user.username
+            for field, value in update_data.items():
+                setattr(db_user, field, value)
         
         try:
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-        except IntegrityError:
+            if returning:
+                db_user = db.scalar(
+                    update(User).where(User.id == user_id).values(**update_data).returning(User)
+                )
+                if db_user is None:
+                    return None
+                commit_loaded(db, db_user)
+            else:
+                db.commit()
+                db.refresh(db_user)
+        except IntegrityError as exc:
             db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username or email already exists"
-            )
+            raise _duplicate_error(_duplicate_field(exc))
+        
+        # Role and activation changes must apply to the very next request
+        principal_cache.delete(previous_username or db_user.username)
+        principal_cache.delete(db_user.username)
+        identity_filter.add(db_user.username, db_user.email)
+        return db_user
+    
     def delete_user(self, db: Session, user_id: int) -> bool:
         db_user = self.get_user(db, user_id)
         if not db_user:
             return False
         
+        username = db_user.username
+        task_stats.clear_user(db, user_id)
+        task_sync.record_owner_deletion(db, user_id)
         db.delete(db_user)
         db.commit()
+        principal_cache.delete(username)
+        # The user's tasks were removed by the cascade
+        task_cache.invalidate_owner(user_id)
         return True
     
-user_service = UserService()
\ No newline at end of file
+
+class AsyncUserService:
+    """UserService counterpart for AsyncSession-backed routes"""
+
+    async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        return await db.scalar(select(User).where(User.id == user_id))
+    
+    async def get_user_by_username(self, db: AsyncSession, username: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.username == username))
+    
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.email == email))
+    
+    async def get_user_by_login(self, db: AsyncSession, username_or_email: str) -> Optional[User]:
+        return await db.scalar(_login_statement(username_or_email))
+    
+    async def get_principal(self, db: AsyncSession, username: str) -> Optional[User]:
+        """Resolve an authenticated user, served from the principal cache when fresh"""
+        snapshot = await call_blocking(principal_cache.blocking, principal_cache.get, username)
+        if snapshot is not None:
+            return _principal_from_snapshot(snapshot)
+        
+        user = await db.scalar(select(User).where(User.username == username))
+        if user is not None:
+            await call_blocking(
+                principal_cache.blocking, principal_cache.set, username, _principal_snapshot(user)
+            )
+            db.expunge(user)
+        return user
+    
+    async def get_users(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+        stmt = select(User).offset(skip).limit(limit)
+        return list(await db.scalars(stmt, bind_arguments=REPLICA_READ))
+    
+    async def create_user(self, db: AsyncSession, user: UserCreate) -> User:
+        if identity_filter.might_exist(user.username, user.email):
+            rows = (await db.execute(_taken_statement(user.username, user.email))).all()
+            field = _taken_field(rows, user.username)
+            if field:
+                raise _duplicate_error(field)
+        
+        values = {
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": await security.get_password_hash_async(user.password),
+            "role": user.role,
+        }
+        
+        try:
+            if supports_returning(db, "insert"):
+                db_user = await db.scalar(insert(User).values(**values).returning(User))
+                await db.commit()
+            else:
+                db_user = User(**values)
+                db.add(db_user)
+                await db.commit()
+                await db.refresh(db_user)
+        except IntegrityError as exc:
+            await db.rollback()
+            field = _duplicate_field(exc)
+            if field is None:
+                rows = (await db.execute(_taken_statement(user.username, user.email))).all()
+                field = _taken_field(rows, user.username)
+            raise _duplicate_error(field)
+        
+        identity_filter.add(db_user.username, db_user.email)
+        return db_user
+    
+    async def update_user(
+        self, db: AsyncSession, user_id: int, user_update: UserUpdate
+    ) -> Optional[User]:
+        update_data = user_update.model_dump(exclude_unset=True)
+        returning = bool(update_data) and supports_returning(db, "update")
+        if returning:
+            previous_username = None
+            if "username" in update_data:
+                previous_username = await db.scalar(
+                    select(User.username).where(User.id == user_id)
+                )
+                if previous_username is None:
+                    return None
+        else:
+            db_user = await self.get_user(db, user_id)
+            if not db_user:
+                return None
+            previous_username = db_user.username
+            for field, value in update_data.items():
+                setattr(db_user, field, value)
+        
+        try:
+            if returning:
+                db_user = await db.scalar(
+                    update(User).where(User.id == user_id).values(**update_data).returning(User)
+                )
+                if db_user is None:
+                    return None
+                await db.commit()
+            else:
+                await db.commit()
+                await db.refresh(db_user)
+        except IntegrityError as exc:
+            await db.rollback()
+            raise _duplicate_error(_duplicate_field(exc))
+        
+        for username in {previous_username or db_user.username, db_user.username}:
+            await call_blocking(principal_cache.blocking, principal_cache.delete, username)
+        identity_filter.add(db_user.username, db_user.email)
+        return db_user
+    
+    async def delete_user(self, db: AsyncSession, user_id: int) -> bool:
+        # The delete-orphan cascade needs the tasks loaded up front: no lazy IO under asyncio
+        db_user = await db.scalar(
+            select(User).options(selectinload(User.tasks)).where(User.id == user_id)
+        )
+        if not db_user:
+            return False
+        
+        username = db_user.username
+        await db.run_sync(task_stats.clear_user, user_id)
+        await db.run_sync(task_sync.record_owner_deletion, user_id)
+        await db.delete(db_user)
+        await db.commit()
+        await call_blocking(principal_cache.blocking, principal_cache.delete, username)
+        await call_blocking(task_cache.blocking, task_cache.invalidate_owner, user_id)
+        return True
+
+
+user_service = UserService()
+async_user_service = AsyncUserService()
\ No newline at end of file
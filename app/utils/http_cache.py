@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, status
+from fastapi.responses import Response
+
+
+class HttpCacheUtils:
+    @staticmethod
+    def format_http_date(value: datetime) -> str:
+        """Format a timestamp as an HTTP-date (naive values are UTC)"""
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+    @staticmethod
+    def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+        """Evaluate If-None-Match / If-Modified-Since against the current validators"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            # Weak comparison, as required for GET
+            return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified.replace(microsecond=0) <= since
+        return False
+
+    @staticmethod
+    def conditional_response(
+        request: Request,
+        body: bytes,
+        etag: str,
+        last_modified: Optional[datetime] = None,
+        media_type: str = "application/json"
+    ) -> Response:
+        """JSON response carrying validators, or 304 when the client copy is current"""
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if last_modified is not None:
+            headers["Last-Modified"] = HttpCacheUtils.format_http_date(last_modified)
+
+        if HttpCacheUtils.is_not_modified(request, etag, last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
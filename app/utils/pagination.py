@@ -0,0 +1,39 @@
+import base64
+import json
+from typing import Any, Dict
+from fastapi import HTTPException, status
+
+
+class CursorUtils:
+    @staticmethod
+    def encode_cursor(data: Dict[str, Any]) -> str:
+        """Encode keyset position into an opaque URL-safe cursor"""
+        raw = json.dumps(data, separators=(",", ":"), sort_keys=True).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Dict[str, Any]:
+        """Decode an opaque cursor produced by encode_cursor"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(data, dict):
+                raise ValueError("cursor payload must be an object")
+            return data
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    @staticmethod
+    def decode_id_cursor(cursor: str) -> int:
+        """Decode a cursor keyed on the row id"""
+        data = CursorUtils.decode_cursor(cursor)
+        last_id = data.get("id")
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return last_id
@@ -0,0 +1,104 @@
+"""Cost of serializing a task listing page: ORM + response_model vs column rows
+
+Each path loads one page from an in-memory SQLite database and turns it into
+response bytes, so the numbers cover hydration as well as encoding. Run from
+the repository root:
+
+    DATABASE_URL=sqlite:///./bench.db SECRET_KEY=bench python -m benchmarks.listing_serialization
+"""
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.task import Task, TaskStatus
+from app.models.user import User, UserRole
+from app.schemas.task import TaskResponse
+from app.services.task_cache import listing_payload, orjson
+from app.services.task_service import TASK_RESPONSE_COLUMNS
+
+adapter = TypeAdapter(List[TaskResponse])
+
+
+def response_model_stdlib(db: Session, limit: int) -> bytes:
+    # What FastAPI does for response_model=List[TaskResponse] with JSONResponse
+    tasks = list(db.scalars(select(Task).limit(limit)))
+    content = adapter.dump_python(adapter.validate_python(tasks, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def response_model_orjson(db: Session, limit: int) -> bytes:
+    # The same with ORJSONResponse as the default response class
+    tasks = list(db.scalars(select(Task).limit(limit)))
+    content = adapter.dump_python(adapter.validate_python(tasks, from_attributes=True), mode="json")
+    return orjson.dumps(content)
+
+
+def orm_dump_json(db: Session, limit: int) -> bytes:
+    # Previous cached listing path: ORM objects validated, then dumped by pydantic-core
+    tasks = list(db.scalars(select(Task).limit(limit)))
+    return adapter.dump_json(adapter.validate_python(tasks, from_attributes=True))
+
+
+def column_rows(db: Session, limit: int) -> bytes:
+    # Current listing path: column tuples straight into bytes
+    rows = list(db.execute(select(*TASK_RESPONSE_COLUMNS).limit(limit)))
+    return listing_payload(rows, limit, cursor_mode=False).body
+
+
+def measure(path: Callable[[Session, int], bytes], db: Session, limit: int, repeat: int) -> float:
+    for _ in range(3):
+        path(db, limit)
+        db.expunge_all()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        path(db, limit)
+        # A fresh request starts with an empty identity map
+        db.expunge_all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        owner = User(username="bench", email="bench@example.com", hashed_password="x", role=UserRole.USER)
+        db.add(owner)
+        db.flush()
+        statuses = list(TaskStatus)
+        db.execute(insert(Task), [
+            {
+                "title": f"Task {index}",
+                "description": "Benchmark task " * 8,
+                "status": statuses[index % len(statuses)],
+                "created_by": owner.id,
+            }
+            for index in range(args.limit)
+        ])
+        db.commit()
+
+        paths = [("response_model + json", response_model_stdlib)]
+        if orjson is not None:
+            paths.append(("response_model + orjson", response_model_orjson))
+        paths += [("orm + dump_json", orm_dump_json), ("column rows", column_rows)]
+
+        baseline = None
+        for name, path in paths:
+            elapsed = measure(path, db, args.limit, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:<24} {elapsed:7.2f} ms/page ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+import os
+import time
+
+# Minimum bcrypt cost keeps the suite fast; must be set before app settings load
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -5,8 +11,14 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.core.database import Base, get_db
-from app.core.security import security
+from app.core.database import Base, get_db, instrument_engine
+from app.core.security import security, verified_tokens
+from app.core.cache import principal_cache
+from app.core.rate_limit import rate_limiter
+from app.core.token_denylist import token_denylist
+from app.services.identity_filter import identity_filter
+from app.services.task_cache import task_cache
+from app.services.task_events import task_events
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -15,6 +27,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base.metadata.create_all(bind=engine)
@@ -28,10 +41,42 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+@pytest.fixture(autouse=True)
+def reset_database():
+    # Every test starts from an empty schema so results don't leak between tests
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    task_cache.clear()
+    task_events.clear()
+    rate_limiter.clear()
+    identity_filter.clear()
+    token_denylist.clear()
+    verified_tokens.clear()
+    yield
+
 @pytest.fixture
 def client():
     return TestClient(app)
 
+@pytest.fixture
+def redis_server():
+    # In-memory stand-in for the redis backends; Lua scripts run through lupa
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def fake_redis(redis_server):
+    import fakeredis
+    return fakeredis.FakeRedis(server=redis_server)
+
+@pytest.fixture
+def redis_clock(monkeypatch):
+    # fakeredis reads TIME and key expiry from time.time
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
 @pytest.fixture
 def test_user_data():
     return {
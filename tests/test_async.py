@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api.v1 import create_api_router
+from app.core.cache import RedisCache
+from app.core.database import get_async_db
+from app.services.task_cache import task_cache
+
+# Same database file as the sync fixtures, reached through aiosqlite
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+@pytest.fixture
+def async_client():
+    app = FastAPI()
+    app.include_router(create_api_router(use_async=True), prefix="/api/v1")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return TestClient(app)
+
+def _login(client, user_data):
+    client.post("/api/v1/auth/register", json=user_data)
+    response = client.post("/api/v1/auth/login", json={
+        "username_or_email": user_data["username"],
+        "password": user_data["password"]
+    })
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_async_task_crud(async_client, test_user_data):
+    headers = _login(async_client, test_user_data)
+    
+    response = async_client.post(
+        "/api/v1/tasks/",
+        json={"title": "Async Task", "status": "pending"},
+        headers=headers
+    )
+    assert response.status_code == 201
+    task_id = response.json()["id"]
+    
+    response = async_client.put(
+        f"/api/v1/tasks/{task_id}",
+        json={"status": "completed"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    
+    response = async_client.get("/api/v1/tasks/", headers=headers)
+    assert [task["id"] for task in response.json()] == [task_id]
+    
+    stats = async_client.get("/api/v1/tasks/stats", headers=headers).json()
+    assert stats["counts"]["completed"] == 1 and stats["counts"]["pending"] == 0
+    
+    response = async_client.delete(f"/api/v1/tasks/{task_id}", headers=headers)
+    assert response.status_code == 204
+    assert async_client.get(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 404
+
+def test_async_admin_deletes_user_with_tasks(async_client, test_user_data, test_admin_data):
+    user_headers = _login(async_client, test_user_data)
+    admin_headers = _login(async_client, test_admin_data)
+    
+    task = async_client.post("/api/v1/tasks/", json={"title": "Owned"}, headers=user_headers).json()
+    user_id = async_client.get("/api/v1/users/me", headers=user_headers).json()["id"]
+    since = async_client.get("/api/v1/tasks/changes", headers=admin_headers).json()["next_since"]
+    
+    response = async_client.delete(f"/api/v1/users/{user_id}", headers=admin_headers)
+    assert response.status_code == 204
+    assert async_client.get("/api/v1/tasks/", headers=admin_headers).json() == []
+    assert async_client.get("/api/v1/tasks/stats", headers=admin_headers).json()["total"] == 0
+    # Cascaded task deletions still reach incremental sync
+    changes = async_client.get(
+        "/api/v1/tasks/changes", params={"since": since}, headers=admin_headers
+    ).json()
+    assert (changes["tasks"], changes["deleted"]) == ([], [task["id"]])
+
+def test_async_routes_use_the_redis_cache_off_the_event_loop(
+    async_client, test_user_data, fake_redis, monkeypatch
+):
+    headers = _login(async_client, test_user_data)
+    backend = RedisCache(namespace="tasks", client=fake_redis)
+    get, on_loop = backend.get, []
+    
+    def tracked_get(key, default=None):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return get(key, default)
+    monkeypatch.setattr(backend, "get", tracked_get)
+    monkeypatch.setattr(task_cache, "backend", backend)
+    
+    task_id = async_client.post(
+        "/api/v1/tasks/", json={"title": "Shared"}, headers=headers
+    ).json()["id"]
+    for _ in range(2):
+        response = async_client.get(f"/api/v1/tasks/{task_id}", headers=headers)
+        assert response.json()["title"] == "Shared"
+    assert on_loop and not any(on_loop)
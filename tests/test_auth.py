@@ -1,6 +1,19 @@
+import time
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from app.api import deps
+from app.core import security as security_module
+from app.core import token_denylist as denylist_module
+from app.core.bloom import BloomFilter
+from app.core.token_denylist import MemoryTokenDenylist, RedisTokenDenylist
+from app.core.security import security
+from app.models.user import User, UserRole
+from app.services.identity_filter import identity_filter
+from app.services.user_service import user_service
+from .conftest import TestingSessionLocal
+
 def test_register_user(client):
     user_data = {
         "username": "newuser",
@@ -24,6 +37,61 @@ def test_register_duplicate_user(client, test_user_data):
     assert response.status_code == 400
     assert "already registered" in response.json()["detail"]
 
+def test_register_reports_which_field_is_taken(client, test_user_data):
+    client.post("/api/v1/auth/register", json=test_user_data)
+    
+    response = client.post("/api/v1/auth/register", json={**test_user_data, "email": "other@example.com"})
+    assert response.json()["detail"] == "Username already registered"
+    response = client.post("/api/v1/auth/register", json={**test_user_data, "username": "other"})
+    assert response.json()["detail"] == "Email already registered"
+
+def test_register_skips_probe_for_new_names_but_unique_index_still_guards(client, test_user_data):
+    identity_filter.load(TestingSessionLocal)
+    free_before = identity_filter.lookups["free"]
+    assert client.post("/api/v1/auth/register", json=test_user_data).status_code == 201
+    assert identity_filter.lookups["free"] == free_before + 1
+    
+    # A row the filter never saw (e.g. written by another worker)
+    with TestingSessionLocal() as db:
+        db.add(User(username="elsewhere", email="elsewhere@example.com", hashed_password="x"))
+        db.commit()
+    response = client.post("/api/v1/auth/register", json={
+        **test_user_data, "username": "elsewhere", "email": "new@example.com"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already registered"
+    assert identity_filter.lookups["free"] == free_before + 2
+
+def test_identity_filter_is_built_off_the_request_path(client, test_user_data, monkeypatch):
+    # Not built yet: registration probes the database
+    free_before = identity_filter.lookups["free"]
+    assert client.post("/api/v1/auth/register", json=test_user_data).status_code == 201
+    assert identity_filter.lookups["free"] == free_before
+    
+    identity_filter.load_in_background(TestingSessionLocal)
+    for _ in range(100):
+        if identity_filter._pending is None:
+            break
+        time.sleep(0.01)
+    assert not identity_filter.might_exist("newcomer", "newcomer@example.com")
+    assert identity_filter.might_exist(test_user_data["username"], "newcomer@example.com")
+    
+    # Filling up schedules a bigger rebuild instead of doing it inline
+    builds = []
+    monkeypatch.setattr(identity_filter, "load_in_background", builds.append)
+    monkeypatch.setattr(identity_filter._filter, "count", identity_filter._filter.capacity)
+    identity_filter.add("crowded", "crowded@example.com")
+    assert builds == [TestingSessionLocal]
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for index in range(1000):
+        bloom.add(f"user{index}")
+    assert all(f"user{index}" in bloom for index in range(1000))
+    false_positives = sum(f"other{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+    assert bloom.is_full
+
 def test_login_valid_credentials(client, test_user_data):
     # Register user
     client.post("/api/v1/auth/register", json=test_user_data)
@@ -37,6 +105,13 @@ def test_login_valid_credentials(client, test_user_data):
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+    
+    # Login with email
+    response = client.post("/api/v1/auth/login", json={
+        "username_or_email": test_user_data["email"],
+        "password": test_user_data["password"]
+    })
+    assert response.status_code == 200
 
 def test_login_invalid_credentials(client, test_user_data):
     # Register user
@@ -47,4 +122,240 @@ def test_login_invalid_credentials(client, test_user_data):
         "username_or_email": test_user_data["username"],
         "password": "wrongpassword"
     })
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_deactivated_user_is_rejected_immediately(client, user_token, admin_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    
+    # Warm the principal cache
+    me = client.get("/api/v1/users/me", headers=headers)
+    assert me.status_code == 200
+    
+    response = client.put(
+        f"/api/v1/users/{me.json()['id']}",
+        json={"is_active": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+def test_login_upgrades_outdated_hash(client, test_user_data, monkeypatch):
+    from passlib.context import CryptContext
+    from app.core import security as security_module
+    from app.models.user import User
+    from tests.conftest import TestingSessionLocal
+    
+    client.post("/api/v1/auth/register", json=test_user_data)
+    
+    # Raise the required cost: the stored hash is now below the minimum
+    stronger = CryptContext(
+        schemes=["bcrypt"], bcrypt__default_rounds=5, bcrypt__min_rounds=5
+    )
+    monkeypatch.setattr(security_module, "pwd_context", stronger)
+    
+    response = client.post("/api/v1/auth/login", json={
+        "username_or_email": test_user_data["username"],
+        "password": test_user_data["password"]
+    })
+    assert response.status_code == 200
+    
+    db = TestingSessionLocal()
+    try:
+        user = db.query(User).filter(User.username == test_user_data["username"]).one()
+        assert user.hashed_password.startswith("$2b$05$")
+    finally:
+        db.close()
+
+def test_password_pool_rejects_when_full():
+    import threading
+    from fastapi import HTTPException
+    from app.core.security import PasswordHashPool
+    
+    pool = PasswordHashPool(max_workers=1, max_queue=0)
+    release = threading.Event()
+    future = pool.submit(release.wait)
+    
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            pool.submit(lambda: None)
+        assert exc_info.value.status_code == 503
+    finally:
+        release.set()
+        future.result()
+    
+    assert pool.stats()["rejected"] == 1
+
+
+def _login(client, user_data):
+    return client.post("/api/v1/auth/login", json={
+        "username_or_email": user_data["username"],
+        "password": user_data["password"]
+    }).json()
+
+def test_refresh_rotates_tokens(client, test_user_data):
+    client.post("/api/v1/auth/register", json=test_user_data)
+    tokens = _login(client, test_user_data)
+    
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["user"]["username"] == test_user_data["username"]
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    
+    # Each refresh token works once
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": refreshed["refresh_token"]}
+    ).status_code == 200
+
+def test_token_types_are_not_interchangeable(client, test_user_data):
+    client.post("/api/v1/auth/register", json=test_user_data)
+    tokens = _login(client, test_user_data)
+    
+    headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+def test_logout_revokes_access_and_refresh_tokens(client, test_user_data):
+    client.post("/api/v1/auth/register", json=test_user_data)
+    tokens = _login(client, test_user_data)
+    other_session = _login(client, test_user_data)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    
+    response = client.post(
+        "/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers
+    )
+    assert response.status_code == 204
+    
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).status_code == 401
+    # Other sessions of the same user are unaffected
+    other_headers = {"Authorization": f"Bearer {other_session['access_token']}"}
+    assert client.get("/api/v1/users/me", headers=other_headers).status_code == 200
+
+def test_denylist_drops_entries_with_their_tokens(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(denylist_module, "_now", lambda: clock[0])
+    denylist = MemoryTokenDenylist(bucket_seconds=60)
+    
+    assert denylist.revoke("a" * 32, expires_at=clock[0] + 30)
+    assert not denylist.revoke("a" * 32, expires_at=clock[0] + 30)
+    assert denylist.revoke("b" * 32, expires_at=clock[0] + 600)
+    assert denylist.is_revoked("a" * 32, clock[0] + 30)
+    assert not denylist.is_revoked("c" * 32, clock[0] + 30)
+    
+    # Revoking anything later prunes buckets whose tokens have all expired
+    clock[0] += 120
+    denylist.revoke("d" * 32, expires_at=clock[0] + 30)
+    assert len(denylist) == 2
+    assert denylist.is_revoked("b" * 32, clock[0] + 480)
+
+def test_redis_denylist_entries_expire_with_their_tokens(fake_redis, redis_clock, monkeypatch):
+    monkeypatch.setattr(denylist_module, "_now", lambda: redis_clock[0])
+    denylist = RedisTokenDenylist(client=fake_redis)
+    expires_at = redis_clock[0] + 30
+    
+    assert denylist.revoke("a" * 32, expires_at)
+    assert not denylist.revoke("a" * 32, expires_at)
+    # Already expired: nothing to store
+    assert denylist.revoke("b" * 32, redis_clock[0] - 1)
+    assert denylist.is_revoked("a" * 32, expires_at)
+    assert not denylist.is_revoked("b" * 32, redis_clock[0] - 1)
+    assert not denylist.is_revoked("c" * 32, expires_at)
+    
+    redis_clock[0] += 31
+    assert not denylist.is_revoked("a" * 32, expires_at)
+    assert not list(fake_redis.scan_iter(match="revoked:*"))
+
+def test_unreachable_denylist_fails_closed_for_refresh_tokens(client, test_user_data, monkeypatch):
+    class Unreachable:
+        def exists(self, *args):
+            raise ConnectionError("redis is down")
+        set = exists
+    
+    client.post("/api/v1/auth/register", json=test_user_data)
+    tokens = client.post("/api/v1/auth/login", json={
+        "username_or_email": test_user_data["username"],
+        "password": test_user_data["password"]
+    }).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    monkeypatch.setattr(security_module, "token_denylist", RedisTokenDenylist(client=Unreachable()))
+    
+    # Access tokens ride out the outage by default; refresh tokens wait for it to end
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    
+    monkeypatch.setattr(security_module.settings, "token_denylist_fail_open", [])
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 503
+
+def test_verified_tokens_skip_decoding_but_not_revocation(client, user_token, monkeypatch):
+    verify = security_module.key_ring.verify
+    calls = []
+    monkeypatch.setattr(security_module.key_ring, "verify", lambda token: calls.append(1) or verify(token))
+    
+    first = security.verify_token(user_token)
+    first["sub"] = "someone-else"
+    assert security.verify_token(user_token)["sub"] != "someone-else"
+    assert len(calls) == 1
+    
+    security.revoke_token(first)
+    with pytest.raises(HTTPException) as exc:
+        security.verify_token(user_token)
+    assert exc.value.detail == "Token has been revoked"
+    assert len(calls) == 1
+
+def test_task_routes_authorize_from_fresh_claims(client, user_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    claims = security.verify_token(user_token)
+    assert claims["role"] == UserRole.USER.value and claims["is_active"] is True
+    
+    def no_lookup(*args, **kwargs):
+        raise AssertionError("principal lookup")
+    monkeypatch.setattr(user_service, "get_principal", no_lookup)
+    monkeypatch.setattr(deps.settings, "token_claims_max_age_seconds", 60)
+    
+    response = client.post("/api/v1/tasks/", json={"title": "From claims"}, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["created_by"] == claims["user_id"]
+    assert client.get("/api/v1/tasks/", headers=headers).status_code == 200
+    
+    # Disabled (the default), the user is loaded as before
+    monkeypatch.setattr(deps.settings, "token_claims_max_age_seconds", 0)
+    with pytest.raises(AssertionError):
+        client.get("/api/v1/tasks/", headers=headers)
+
+def test_stale_claims_are_not_trusted(monkeypatch):
+    monkeypatch.setattr(deps.settings, "token_claims_max_age_seconds", 60)
+    payload = {"sub": "alice", "user_id": 7, "role": "admin", "is_active": True}
+    
+    user = deps._claims_user({**payload, "iat": int(time.time()) - 5})
+    assert (user.id, user.username, user.role) == (7, "alice", UserRole.ADMIN)
+    assert deps._claims_user({**payload, "iat": int(time.time()) - 120}) is None
+    # Tokens issued before claims were embedded
+    assert deps._claims_user({"sub": "alice", "iat": int(time.time())}) is None
+
+def test_partial_claims_fall_back_to_the_lookup(client, user_token, monkeypatch):
+    monkeypatch.setattr(deps.settings, "token_claims_max_age_seconds", 60)
+    claims = security.verify_token(user_token)
+    now = int(time.time())
+    
+    for missing in ("role", "is_active", "user_id"):
+        partial = {key: value for key, value in claims.items() if key != missing}
+        assert deps._claims_user({**partial, "iat": now}) is None
+    assert deps._claims_user({**claims, "iat": now, "role": "superuser"}) is None
+    
+    token = security.create_access_token({"sub": claims["sub"], "user_id": claims["user_id"]})
+    response = client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
@@ -0,0 +1,107 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCache, RedisCache, cached, cache_key
+from app.models.user import User, UserRole
+from app.services import user_service as user_service_module
+from app.services.task_cache import CachedPayload, TaskCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "_now", lambda: now[0])
+    return now
+
+def test_entries_expire_after_ttl(clock):
+    store = MemoryCache(max_size=10, default_ttl=60)
+    store.set("a", 1)
+    store.set("b", 2, ttl=5)
+    
+    clock[0] += 10
+    assert store.get("a") == 1
+    assert store.get("b") is None
+    assert store.stats()["expirations"] == 1
+
+def test_lru_eviction():
+    store = MemoryCache(max_size=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+def test_cached_decorator(monkeypatch):
+    monkeypatch.setattr(cache_module, "cache", MemoryCache())
+    calls = []
+    
+    @cached(ttl=30)
+    def compute(x, y=0):
+        calls.append((x, y))
+        return None if x == 0 else x + y
+    
+    assert compute(1, y=2) == 3
+    assert compute(1, y=2) == 3
+    assert compute(0) is None
+    assert compute(0) is None
+    assert calls == [(1, 2), (0, 0)]
+
+def test_cache_key_is_stable():
+    assert cache_key(1, a="x", b=2) == cache_key(1, b=2, a="x")
+    assert cache_key(1) != cache_key(2)
+
+def test_redis_cache_expiry_and_counters(fake_redis, redis_clock):
+    store = RedisCache(namespace="tasks", default_ttl=60, client=fake_redis)
+    other = RedisCache(namespace="users", client=fake_redis)
+    store.set("a", {"id": 1})
+    store.set("b", 2, ttl=5)
+    store.set("forever", 3, ttl=0)
+    other.set("a", "other")
+    
+    redis_clock[0] += 10
+    assert store.get("a") == {"id": 1}
+    assert store.get("b") is None
+    assert fake_redis.ttl("tasks:forever") == -1
+    
+    # The server evicts under its maxmemory policy; an evicted key reads as a miss
+    fake_redis.delete("tasks:a")
+    assert store.get("a", "fallback") == "fallback"
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 2
+    
+    # Namespaces share one server without touching each other's keys
+    store.clear()
+    assert store.get("forever") is None
+    assert other.get("a") == "other"
+
+def test_redis_cache_stores_json(fake_redis, monkeypatch):
+    store = RedisCache(namespace="tasks", client=fake_redis)
+    store.set("a", {"id": 1, "tags": ("x", "y")})
+    assert json.loads(fake_redis.get("tasks:a")) == {"id": 1, "tags": ["x", "y"]}
+    
+    # Task payloads and principals convert themselves to JSON types
+    tasks = TaskCache(store)
+    payload = CachedPayload.build(b'{"id":1}', datetime(2024, 5, 1, 12, 30))
+    tasks.set("task:1", payload)
+    assert tasks.get("task:1") == payload
+    
+    monkeypatch.setattr(user_service_module, "principal_cache", RedisCache(client=fake_redis))
+    user = User(
+        id=7, username="alice", email="alice@example.com", role=UserRole.ADMIN,
+        is_active=True, created_at=datetime(2024, 5, 1), updated_at=None
+    )
+    user_service_module.principal_cache.set("alice", user_service_module._principal_snapshot(user))
+    cached_user = user_service_module.user_service.get_principal(None, "alice")
+    assert (cached_user.id, cached_user.role, cached_user.created_at) == (
+        7, UserRole.ADMIN, datetime(2024, 5, 1)
+    )
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.database import create_app_engine, pool_status
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
+from app.main import app
+
+
+def test_readiness_reports_pool_and_latency(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    report = body["databases"]["default"]
+    assert report["latency_ms"] >= 0
+    assert 0 <= report["saturation"] < 1
+    assert report["capacity"] == settings.db_pool_size + settings.db_max_overflow
+
+def test_readiness_sheds_when_pool_is_saturated(client, monkeypatch):
+    monkeypatch.setattr(settings, "health_ready_max_pool_saturation", 0.0)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["databases"]["default"]["error"] == "connection pool saturated"
+
+def test_engine_applies_pool_settings_and_sqlite_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 2)
+    monkeypatch.setattr(settings, "db_max_overflow", 1)
+    engine = create_app_engine(f"sqlite:///{tmp_path}/tuned.db")
+    try:
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            # NORMAL
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+            assert pool_status(engine)["checked_out"] == 1
+        assert pool_status(engine)["capacity"] == 3
+    finally:
+        engine.dispose()
+
+def test_async_engine_checkouts_are_timed(tmp_path):
+    # Built the way ASYNC_DATABASE=true builds it, so the instrumented async pool is used
+    engine = create_app_engine(f"sqlite+aiosqlite:///{tmp_path}/async.db", metrics_name="async_test")
+    
+    async def run():
+        try:
+            async with engine.connect() as connection:
+                assert (await connection.exec_driver_sql("SELECT 1")).scalar() == 1
+                assert pool_status(engine.sync_engine)["checked_out"] == 1
+        finally:
+            await engine.dispose()
+    
+    asyncio.run(run())
+    assert type(engine.sync_engine.pool).__name__ == "InstrumentedAsyncAdaptedQueuePool"
+    assert 'db_pool_checkout_wait_seconds_count{engine="async_test"} 1' in DB_POOL_CHECKOUT_WAIT.render()
@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import hmac
+import json
+import ecdsa
+import pytest
+import rsa
+from jose import JWTError, jwt
+
+from app.core.keys import KeyRing
+
+
+@pytest.fixture(scope="module")
+def rsa_keys():
+    old_public, old_private = rsa.newkeys(1024)
+    _, new_private = rsa.newkeys(1024)
+    return {
+        "old_private": old_private.save_pkcs1().decode(),
+        "old_public": old_public.save_pkcs1().decode(),
+        "new_private": new_private.save_pkcs1().decode(),
+    }
+
+
+def test_rotation_keeps_retired_keys_verifying(rsa_keys):
+    old_ring = KeyRing("RS256", rsa_keys["old_private"])
+    token = old_ring.sign({"sub": "alice"})
+    assert jwt.get_unverified_header(token)["kid"] == old_ring.kid
+
+    ring = KeyRing(
+        "RS256", rsa_keys["new_private"], verification_keys={old_ring.kid: rsa_keys["old_public"]}
+    )
+    assert ring.kid != old_ring.kid
+    assert ring.verify(token)["sub"] == "alice"
+    assert ring.verify(ring.sign({"sub": "bob"}))["sub"] == "bob"
+
+    # Once the old key is dropped its tokens stop verifying
+    with pytest.raises(JWTError):
+        KeyRing("RS256", rsa_keys["new_private"]).verify(token)
+
+
+def test_jwks_publishes_public_keys_only(rsa_keys):
+    ring = KeyRing("RS256", rsa_keys["new_private"], verification_keys={"old": rsa_keys["old_private"]})
+    body, etag = ring.jwks()
+    keys = {key["kid"]: key for key in json.loads(body)["keys"]}
+
+    assert set(keys) == {ring.kid, "old"}
+    assert all(key["kty"] == "RSA" and key["alg"] == "RS256" and "d" not in key for key in keys.values())
+    assert ring.jwks() == (body, etag)
+
+
+def _segment(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def test_tokens_cannot_choose_their_algorithm(rsa_keys):
+    ring = KeyRing("RS256", rsa_keys["old_private"], kid="k1")
+    # HMAC "signed" with the published public key
+    signing_input = ".".join(
+        _segment(json.dumps(part).encode())
+        for part in ({"alg": "HS256", "typ": "JWT", "kid": "k1"}, {"sub": "mallory"})
+    )
+    signature = hmac.new(rsa_keys["old_public"].encode(), signing_input.encode(), hashlib.sha256).digest()
+    forged = f"{signing_input}.{_segment(signature)}"
+    with pytest.raises(JWTError):
+        ring.verify(forged)
+    # Same key, but a key id the ring doesn't know
+    unknown = KeyRing("RS256", rsa_keys["old_private"], kid="k2").sign({"sub": "alice"})
+    with pytest.raises(JWTError):
+        ring.verify(unknown)
+
+
+def test_ecdsa_keys():
+    private = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem().decode()
+    ring = KeyRing("ES256", private)
+    assert ring.verify(ring.sign({"sub": "alice"}))["sub"] == "alice"
+    assert json.loads(ring.jwks()[0])["keys"][0]["crv"] == "P-256"
+
+
+def test_jwks_endpoint(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    # HMAC secrets are never published
+    assert response.json() == {"keys": []}
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    response = client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
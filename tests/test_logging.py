@@ -0,0 +1,36 @@
+import json
+import logging
+import queue
+
+from app.core.logging import CustomFormatter, DroppingQueueHandler
+
+
+def _record(level, message, *args):
+    return logging.LogRecord("tests", level, __file__, 1, message, args, None)
+
+def test_queue_handler_samples_then_drops_without_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=8), sample_every=2, high_watermark=0.5)
+    
+    for index in range(12):
+        handler.handle(_record(logging.INFO, "info %d", index))
+    handler.handle(_record(logging.ERROR, "error"))
+    
+    # 4 queued freely; past the watermark every other INFO is kept until full
+    assert handler.queue.qsize() == 8
+    assert handler.sampled["INFO"] == 4
+    # Errors are never sampled, but a full queue still drops rather than blocks
+    assert handler.dropped == {"ERROR": 1}
+    
+    # Records are resolved before they cross threads
+    first = handler.queue.get_nowait()
+    assert first.msg == "info 0" and first.args is None
+
+def test_formatter_uses_record_time_and_static_fields():
+    formatter = CustomFormatter()
+    record = _record(logging.WARNING, "hello %s", "world")
+    record.created = 1700000000.25
+    
+    entry = json.loads(formatter.format(record))
+    assert entry["timestamp"] == "2023-11-14T22:13:20.250000"
+    assert entry["message"] == "hello world"
+    assert entry["service"] and entry["pid"]
@@ -0,0 +1,81 @@
+import re
+import threading
+
+from app.core.metrics import Counter, Histogram, Registry, QueryStats, current_query_stats
+from tests.conftest import engine
+
+
+def _sample(text, name, **labels):
+    for line in text.splitlines():
+        if line.startswith(name) and all(f'{key}="{value}"' in line for key, value in labels.items()):
+            rest = line[len(name):]
+            if rest.startswith("{") or rest.startswith(" "):
+                return float(line.rsplit(" ", 1)[1])
+    return None
+
+def test_counter_shards_sum_across_threads(monkeypatch):
+    from app.core import metrics as metrics_module
+    monkeypatch.setattr(metrics_module, "registry", Registry())
+    counter = Counter("jobs_total", "Jobs", ("kind",))
+    
+    def work():
+        for _ in range(1000):
+            counter.labels("a").inc()
+    
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert counter.labels("a").value() == 4000
+    text = metrics_module.registry.render()
+    assert 'jobs_total{kind="a"} 4000' in text
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    from app.core import metrics as metrics_module
+    monkeypatch.setattr(metrics_module, "registry", Registry())
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    
+    text = metrics_module.registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 4.05" in text
+
+def test_queries_are_attributed_to_the_current_request():
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+            connection.exec_driver_sql("SELECT 2")
+    finally:
+        current_query_stats.reset(token)
+    assert stats.count == 2
+    assert stats.seconds > 0
+
+def test_metrics_endpoint(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    task_id = client.post("/api/v1/tasks/", json={"title": "Measured"}, headers=headers).json()["id"]
+    client.get(f"/api/v1/tasks/{task_id}", headers=headers)
+    client.get(f"/api/v1/tasks/{task_id}", headers=headers)
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    
+    # Route templates, not raw paths
+    assert _sample(
+        text, "http_requests_total", method="GET", route="/api/v1/tasks/{task_id}", status="200"
+    ) >= 2
+    assert f"/api/v1/tasks/{task_id}\"" not in text
+    assert _sample(text, "db_queries_per_request_count") >= 1
+    assert _sample(text, "db_query_duration_seconds_count") >= 1
+    assert _sample(text, "password_hash_duration_seconds_count") >= 2
+    assert _sample(text, "cache_hits_total", cache="tasks") >= 1
+    assert re.search(r'^cache_hit_ratio\{cache="principal"\} [0-9.]+$', text, re.M)
@@ -0,0 +1,18 @@
+def test_security_headers_on_api_and_streaming_responses(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/v1/tasks/", json={"title": "Streamed"}, headers=headers)
+    
+    for path in ("/health", "/api/v1/tasks/", "/api/v1/tasks/export"):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert response.headers["Content-Security-Policy"] == "default-src 'self'"
+    
+    assert "X-RateLimit-Remaining" in response.headers
+    assert response.text.count("\n") == 1
+    
+    # Swagger UI loads its assets from a CDN
+    response = client.get("/docs")
+    assert "Content-Security-Policy" not in response.headers
+    assert response.headers["X-Frame-Options"] == "DENY"
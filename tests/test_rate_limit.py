@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app import middleware as middleware_module
+from app.core import rate_limit as rate_limit_module
+from app.core.rate_limit import MemoryRateLimiter, RateLimitPolicy, RateLimitRule, RedisRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit_module, "_now", lambda: now[0])
+    return now
+
+def test_gcra_allows_burst_then_refills(clock):
+    limiter = MemoryRateLimiter()
+    rule = RateLimitRule.parse("3/60")
+    
+    results = [limiter.hit("k", rule) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20)
+    
+    # One request's worth of capacity comes back every period / limit
+    clock[0] += 20
+    assert limiter.hit("k", rule).allowed
+    assert not limiter.hit("k", rule).allowed
+    assert limiter.hit("other", rule).allowed
+
+def test_remaining_counts_fractional_intervals(clock):
+    # period / limit = 0.2s, which float division can't represent exactly
+    limiter = MemoryRateLimiter()
+    assert limiter.hit("k", RateLimitRule.parse("300/60")).remaining == 299
+
+def test_redis_gcra_matches_memory_limiter(fake_redis, redis_clock):
+    # Same burst and refill as the in-process limiter, run by the Lua script
+    limiter = RedisRateLimiter(client=fake_redis)
+    rule = RateLimitRule.parse("3/60")
+    
+    results = [limiter.hit("k", rule) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20)
+    assert limiter.hit("fractional", RateLimitRule.parse("300/60")).remaining == 299
+    
+    redis_clock[0] += 20
+    assert limiter.hit("k", rule).allowed
+    assert not limiter.hit("k", rule).allowed
+    assert limiter.hit("other", rule).allowed
+    
+    # Keys expire once their bucket would be full again
+    redis_clock[0] += 41
+    assert fake_redis.get("ratelimit:other") is None
+    assert fake_redis.get("ratelimit:k") is not None
+    limiter.clear()
+    assert limiter.hit("k", rule).remaining == 2
+
+def test_idle_keys_are_swept_and_bounded(clock):
+    limiter = MemoryRateLimiter(max_keys=2, sweep_interval=30)
+    rule = RateLimitRule.parse("10/10")
+    for key in ("a", "b", "c"):
+        limiter.hit(key, rule)
+    assert len(limiter) == 2
+    assert limiter.evictions == 1
+    
+    clock[0] += 31
+    limiter.hit("d", rule)
+    assert len(limiter) == 1
+
+def test_policy_prefers_most_specific_rule():
+    policy = RateLimitPolicy("100/60", "300/60", {
+        "/api/v1/tasks": "50/60",
+        "POST /api/v1/tasks/bulk": "5/60",
+    })
+    assert policy.resolve("POST", "/api/v1/tasks/bulk", True)[0] == "POST /api/v1/tasks/bulk"
+    assert policy.resolve("GET", "/api/v1/tasks/bulk", True)[0] == "/api/v1/tasks"
+    assert policy.resolve("GET", "/api/v1/users/me", True)[0] == "user"
+    assert policy.resolve("GET", "/api/v1/users/me", False)[0] == "default"
+    with pytest.raises(ValueError):
+        RateLimitRule.parse("ten/minute")
+
+def test_middleware_limits_per_user_and_route(client, user_token, admin_token, monkeypatch):
+    monkeypatch.setattr(rate_limit_module.rate_limit_policy, "user_default", RateLimitRule(2, 60))
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    
+    responses = [client.get("/api/v1/tasks/", headers=user_headers) for _ in range(3)]
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2"
+    assert responses[0].headers["X-RateLimit-Remaining"] == "1"
+    assert int(responses[2].headers["Retry-After"]) >= 1
+    
+    # Buckets are per user, not per client address
+    response = client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert client.get("/health").status_code == 200
+
+def test_middleware_calls_redis_limiter_off_the_event_loop(client, fake_redis, monkeypatch):
+    limiter = RedisRateLimiter(client=fake_redis)
+    hit, on_loop = limiter.hit, []
+    
+    def tracked_hit(key, rule):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return hit(key, rule)
+    monkeypatch.setattr(limiter, "hit", tracked_hit)
+    monkeypatch.setattr(middleware_module, "rate_limiter", limiter)
+    
+    response = client.get("/api/v1/tasks/")
+    assert "X-RateLimit-Limit" in response.headers
+    assert on_loop == [False]
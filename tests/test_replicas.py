@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import REPLICA_READ, ReplicaSet, RoutingSession
+from app.models.task import Task
+from app.models.user import User, UserRole
+from app.services.task_service import task_service
+from app.services.user_service import user_service
+
+
+def _database(path, username):
+    db_engine = create_engine(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(
+            username=username, email=f"{username}@example.com",
+            hashed_password="x", role=UserRole.USER
+        ))
+    return db_engine
+
+
+def _usernames(db, **bind_arguments):
+    return [user.username for user in db.scalars(select(User), bind_arguments=bind_arguments)]
+
+
+def test_replica_reads_until_the_session_writes(tmp_path):
+    primary = _database(tmp_path / "primary.db", "primary")
+    replica = _database(tmp_path / "replica.db", "replica")
+    Session = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet({"r": replica}))
+
+    with Session() as db:
+        assert _usernames(db) == ["primary"]
+        assert _usernames(db, **REPLICA_READ) == ["replica"]
+        
+        db.add(User(username="new", email="new@example.com", hashed_password="x"))
+        db.flush()
+        # Read-after-write: the session's own writes must be visible
+        assert _usernames(db, **REPLICA_READ) == ["primary", "new"]
+
+
+def test_replicas_rotate_and_failed_ones_are_ejected(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(database, "_now", lambda: clock[0])
+    healthy = _database(tmp_path / "healthy.db", "healthy")
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir/replica.db")
+    replicas = ReplicaSet({"healthy": healthy, "broken": broken}, eject_seconds=30)
+    
+    assert {replicas.choose(), replicas.choose()} == {healthy, broken}
+    
+    with pytest.raises(OperationalError):
+        with broken.connect():
+            pass
+    assert replicas.is_ejected("broken")
+    assert {replicas.choose() for _ in range(4)} == {healthy}
+    
+    clock[0] += 31
+    assert not replicas.is_ejected("broken")
+    assert {replicas.choose(), replicas.choose()} == {healthy, broken}
+
+
+def test_all_replicas_ejected_falls_back_to_primary(tmp_path):
+    primary = _database(tmp_path / "primary.db", "primary")
+    replica = _database(tmp_path / "replica.db", "replica")
+    replicas = ReplicaSet({"r": replica})
+    replicas.eject("r")
+    Session = sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas)
+
+    with Session() as db:
+        assert _usernames(db, **REPLICA_READ) == ["primary"]
+
+
+def test_cache_filling_reads_use_the_primary(tmp_path):
+    primary = _database(tmp_path / "primary.db", "alice")
+    replica = _database(tmp_path / "replica.db", "alice")
+    # The replica hasn't caught up with a rename and a promotion yet
+    for db_engine, title in ((primary, "Renamed"), (replica, "Original")):
+        with db_engine.begin() as connection:
+            connection.execute(Task.__table__.insert().values(title=title, created_by=1))
+    with primary.begin() as connection:
+        connection.execute(User.__table__.update().values(role=UserRole.ADMIN))
+    Session = sessionmaker(class_=RoutingSession, bind=primary, replicas=ReplicaSet({"r": replica}))
+
+    with Session() as db:
+        user = user_service.get_principal(db, "alice")
+        assert user.role == UserRole.ADMIN
+        assert task_service.get_task(db, 1, user).title == "Renamed"
+        assert [task.title for task in task_service.get_tasks(db, user)] == ["Renamed"]
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1 import tasks as tasks_module
+from app.models.user import User, UserRole
+from app.services.task_events import DELETED, RedisEventBroker, TaskEventBus, task_events
+
+
+def _events_socket(client, token, **params):
+    query = "&".join(f"{name}={value}" for name, value in {"token": token, **params}.items())
+    return client.websocket_connect(f"/api/v1/tasks/events/ws?{query}")
+
+
+def test_events_follow_task_ownership(client, user_token, admin_token):
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    
+    with _events_socket(client, user_token) as user_events, _events_socket(client, admin_token) as admin_events:
+        admin_task = client.post("/api/v1/tasks/", json={"title": "Admin task"}, headers=admin_headers).json()
+        task = client.post("/api/v1/tasks/", json={"title": "Mine"}, headers=user_headers).json()
+        client.put(f"/api/v1/tasks/{task['id']}", json={"status": "completed"}, headers=user_headers)
+        client.delete(f"/api/v1/tasks/{task['id']}", headers=user_headers)
+        
+        # The admin's own task never reaches the user
+        created = user_events.receive_json()
+        assert (created["type"], created["task"]) == ("created", task)
+        updated = user_events.receive_json()
+        assert updated["type"] == "updated" and updated["task"]["status"] == "completed"
+        deleted = user_events.receive_json()
+        assert (deleted["type"], deleted["task_id"], deleted["task"]) == ("deleted", task["id"], None)
+        assert created["id"] < updated["id"] < deleted["id"]
+        
+        assert [admin_events.receive_json()["task_id"] for _ in range(4)] == [
+            admin_task["id"], task["id"], task["id"], task["id"]
+        ]
+
+def test_events_resume_after_last_seen_id(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    with _events_socket(client, user_token) as events:
+        results = client.post(
+            "/api/v1/tasks/bulk", json={"items": [{"title": "One"}, {"title": "Two"}]}, headers=headers
+        )
+        first = events.receive_json()
+        second = events.receive_json()
+    assert [first["task_id"], second["task_id"]] == [result["id"] for result in results.json()["results"]]
+    
+    with _events_socket(client, user_token, last_event_id=first["id"]) as events:
+        assert events.receive_json()["id"] == second["id"]
+    
+    # An id this process never issued: the client has to resync
+    with _events_socket(client, user_token, last_event_id=second["id"] + 100) as events:
+        assert events.receive_json() == {
+            "id": second["id"], "type": "reset", "task_id": None, "owner_id": None, "task": None
+        }
+
+def test_events_socket_requires_a_valid_token(client):
+    with pytest.raises(WebSocketDisconnect):
+        with _events_socket(client, "not-a-token") as events:
+            events.receive_json()
+    assert task_events.subscriber_count == 0
+
+def test_server_sent_events_stream(monkeypatch):
+    monkeypatch.setattr(tasks_module.settings, "task_events_heartbeat_seconds", 0.01)
+    
+    async def run():
+        subscription = task_events.subscribe(User(id=1, role=UserRole.USER))
+        chunks = tasks_module._sse_chunks(subscription)
+        assert await chunks.__anext__() == ": keep-alive\n\n"
+        
+        task_events.publish_deleted({5: 2, 6: 1})
+        chunk = await chunks.__anext__()
+        assert chunk.startswith("id: ")
+        assert '\nevent: deleted\ndata: {' in chunk and '"task_id":6' in chunk
+        
+        await chunks.aclose()
+        assert task_events.subscriber_count == 0
+    
+    asyncio.run(run())
+
+class _FlakyPubSubClient:
+    """Redis client whose first subscription attempt fails, to exercise the reconnect"""
+
+    def __init__(self, client):
+        self._client = client
+        self.failures = 1
+
+    def pubsub(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return self._client.pubsub(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_redis_broker_fans_events_out_between_workers(redis_server):
+    import fakeredis
+    publisher = TaskEventBus(
+        RedisEventBroker(client=fakeredis.FakeRedis(server=redis_server)), history_size=10, queue_size=10
+    )
+    flaky = _FlakyPubSubClient(fakeredis.FakeRedis(server=redis_server))
+    subscriber = TaskEventBus(
+        RedisEventBroker(client=flaky, reconnect_delay=0.01), history_size=10, queue_size=10
+    )
+    # Pub/sub keeps nothing, so both listeners (one after a reconnect) must be up first
+    _wait_for(lambda: flaky.pubsub_numsub("task-events")[0][1] == 2)
+    assert flaky.failures == 0
+    
+    publisher.publish_deleted({5: 2, 6: 1})
+    publisher.publish_deleted({7: 1})
+    for bus in (publisher, subscriber):
+        _wait_for(lambda: len(bus._history) == 3)
+        assert [(event.id, event.type, event.task_id) for event in bus._history] == [
+            (1, DELETED, 5), (2, DELETED, 6), (3, DELETED, 7)
+        ]
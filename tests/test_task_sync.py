@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from app.services.task_sync import task_sync
+from .conftest import TestingSessionLocal
+
+
+def _changes(client, headers, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    response = client.get("/api/v1/tasks/changes", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_changes_snapshot_then_increments(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    kept = client.post("/api/v1/tasks/", json={"title": "Kept"}, headers=headers).json()
+    doomed = client.post("/api/v1/tasks/", json={"title": "Doomed"}, headers=headers).json()
+    # Deleted before the first sync: the client never had it, so it isn't reported
+    early = client.post("/api/v1/tasks/", json={"title": "Early"}, headers=headers).json()
+    client.delete(f"/api/v1/tasks/{early['id']}", headers=headers)
+
+    snapshot = _changes(client, headers)
+    assert [task["id"] for task in snapshot["tasks"]] == [kept["id"], doomed["id"]]
+    assert (snapshot["deleted"], snapshot["has_more"]) == ([], False)
+
+    # Nothing new: the token comes back unchanged
+    unchanged = _changes(client, headers, snapshot["next_since"])
+    assert (unchanged["tasks"], unchanged["deleted"]) == ([], [])
+    assert unchanged["next_since"] == snapshot["next_since"]
+
+    client.put(f"/api/v1/tasks/{kept['id']}", json={"status": "completed"}, headers=headers)
+    client.delete(f"/api/v1/tasks/{doomed['id']}", headers=headers)
+    changes = _changes(client, headers, snapshot["next_since"])
+    assert [(task["id"], task["status"]) for task in changes["tasks"]] == [(kept["id"], "completed")]
+    assert changes["deleted"] == [doomed["id"]]
+
+def test_changes_page_without_gaps(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    items = [{"title": f"Task {index}"} for index in range(5)]
+    ids = [result["id"] for result in client.post(
+        "/api/v1/tasks/bulk", json={"items": items}, headers=headers
+    ).json()["results"]]
+    client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": ids[:1]}, headers=headers)
+    client.patch("/api/v1/tasks/bulk", json={"items": [{"id": ids[1], "title": "Renamed"}]}, headers=headers)
+
+    seen, since = [], None
+    while True:
+        page = _changes(client, headers, since, limit=2)
+        assert len(page["tasks"]) + len(page["deleted"]) <= 2
+        seen.extend(task["id"] for task in page["tasks"])
+        since = page["next_since"]
+        if not page["has_more"]:
+            break
+    # Each surviving task once, in write order, the renamed one last
+    assert seen == ids[2:] + [ids[1]]
+
+def test_changes_follow_task_ownership(client, user_token, admin_token):
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    admin_task = client.post("/api/v1/tasks/", json={"title": "Admin"}, headers=admin_headers).json()
+    since = _changes(client, user_headers)["next_since"]
+    admin_snapshot = _changes(client, admin_headers)
+    assert [task["id"] for task in admin_snapshot["tasks"]] == [admin_task["id"]]
+
+    task = client.post("/api/v1/tasks/", json={"title": "Mine"}, headers=user_headers).json()
+    client.delete(f"/api/v1/tasks/{admin_task['id']}", headers=admin_headers)
+    # An admin's write to someone else's task is versioned under its owner
+    client.put(f"/api/v1/tasks/{task['id']}", json={"title": "Edited"}, headers=admin_headers)
+
+    changes = _changes(client, user_headers, since)
+    assert [(t["id"], t["title"]) for t in changes["tasks"]] == [(task["id"], "Edited")]
+    assert changes["deleted"] == []
+    # Admins merge every owner's changes
+    changes = _changes(client, admin_headers, admin_snapshot["next_since"])
+    assert ([t["id"] for t in changes["tasks"]], changes["deleted"]) == ([task["id"]], [admin_task["id"]])
+
+def test_pruned_tokens_must_start_over(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    kept = client.post("/api/v1/tasks/", json={"title": "Kept"}, headers=headers).json()
+    gone = client.post("/api/v1/tasks/", json={"title": "Gone"}, headers=headers).json()
+    since = _changes(client, headers)["next_since"]
+    client.delete(f"/api/v1/tasks/{gone['id']}", headers=headers)
+
+    with TestingSessionLocal() as db:
+        assert task_sync.prune_tombstones(db, datetime.utcnow() + timedelta(days=1)) == 1
+
+    response = client.get("/api/v1/tasks/changes", params={"since": since}, headers=headers)
+    assert response.status_code == 410
+    # A fresh sync is past the pruned deletions, even though its tasks are older than them
+    fresh = _changes(client, headers)
+    assert [task["id"] for task in fresh["tasks"]] == [kept["id"]]
+    assert _changes(client, headers, fresh["next_since"])["deleted"] == []
+
+    response = client.get("/api/v1/tasks/changes", params={"since": "garbage"}, headers=headers)
+    assert response.status_code == 400
@@ -1,4 +1,15 @@
 import pytest
+from datetime import datetime, timezone
+from typing import List
+from pydantic import TypeAdapter
+
+from app.core.metrics import QueryStats, current_query_stats
+from app.models.task import TaskStatus
+from app.models.user import User
+from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
+from app.services.task_cache import TASK_FIELDS, CachedPayload, listing_payload, task_cache
+from app.services.task_service import task_service
+from .conftest import TestingSessionLocal
 
 def test_create_task(client, user_token):
     task_data = {
@@ -90,4 +101,321 @@ def test_user_can_only_see_own_tasks(client, user_token, admin_token):
     
     assert response.status_code == 200
     data = response.json()
-    assert len(data) == 2
\ No newline at end of file
+    assert len(data) == 2
+
+def test_cursor_pagination(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for i in range(5):
+        client.post(
+            "/api/v1/tasks/",
+            json={"title": f"Task {i}", "status": "pending"},
+            headers=headers
+        )
+    
+    response = client.get(
+        "/api/v1/tasks/?pagination=cursor&limit=2",
+        headers=headers
+    )
+    assert response.status_code == 200
+    page = response.json()
+    titles = [task["title"] for task in page["items"]]
+    
+    while page["next_cursor"]:
+        response = client.get(
+            f"/api/v1/tasks/?cursor={page['next_cursor']}&limit=2",
+            headers=headers
+        )
+        assert response.status_code == 200
+        page = response.json()
+        titles.extend(task["title"] for task in page["items"])
+    
+    assert titles == [f"Task {i}" for i in range(5)]
+
+def test_invalid_cursor(client, user_token):
+    response = client.get(
+        "/api/v1/tasks/?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 400
+
+def test_read_task_conditional_get(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    task_id = client.post(
+        "/api/v1/tasks/",
+        json={"title": "Cached Task", "status": "pending"},
+        headers=headers
+    ).json()["id"]
+    
+    response = client.get(f"/api/v1/tasks/{task_id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+    
+    response = client.get(
+        f"/api/v1/tasks/{task_id}",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    
+    # A write invalidates the cached payload and changes the validator
+    client.put(
+        f"/api/v1/tasks/{task_id}",
+        json={"status": "completed"},
+        headers=headers
+    )
+    response = client.get(
+        f"/api/v1/tasks/{task_id}",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.headers["ETag"] != etag
+
+def test_cached_listing_reflects_new_tasks(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/v1/tasks/", json={"title": "First"}, headers=headers)
+    assert len(client.get("/api/v1/tasks/", headers=headers).json()) == 1
+    
+    client.post("/api/v1/tasks/", json={"title": "Second"}, headers=headers)
+    assert len(client.get("/api/v1/tasks/", headers=headers).json()) == 2
+    
+    # Cached task is still hidden from other non-admin users
+    task_id = client.get("/api/v1/tasks/", headers=headers).json()[0]["id"]
+    assert client.get(f"/api/v1/tasks/{task_id}", headers=headers).status_code == 200
+    client.post("/api/v1/auth/register", json={
+        "username": "otheruser",
+        "email": "other@example.com",
+        "password": "otherpassword123"
+    })
+    other_token = client.post("/api/v1/auth/login", json={
+        "username_or_email": "otheruser",
+        "password": "otherpassword123"
+    }).json()["access_token"]
+    response = client.get(
+        f"/api/v1/tasks/{task_id}",
+        headers={"Authorization": f"Bearer {other_token}"}
+    )
+    assert response.status_code == 404
+
+def test_cache_set_racing_a_write_is_never_read():
+    # The read computed its key, then a write to the task committed
+    key = task_cache.task_key(7, 1)
+    task_cache.invalidate(1, 7)
+    task_cache.set(key, CachedPayload.build(b"stale"))
+    assert task_cache.get(task_cache.task_key(7, 1)) is None
+    assert task_cache.get(task_cache.task_key(task_cache.ALL, 1)) is None
+
+def test_listings_are_validated_by_etag_only(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    ids = [
+        client.post("/api/v1/tasks/", json={"title": title}, headers=headers).json()["id"]
+        for title in ("Older", "Newer")
+    ]
+    response = client.get("/api/v1/tasks/", headers=headers)
+    assert "Last-Modified" not in response.headers
+    
+    # Deleting the older task leaves the newest timestamp on the page unchanged
+    client.delete(f"/api/v1/tasks/{ids[0]}", headers=headers)
+    response = client.get(
+        "/api/v1/tasks/",
+        headers={**headers, "If-Modified-Since": "Fri, 31 Dec 2100 23:59:59 GMT"}
+    )
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == ids[1:]
+
+def test_bulk_create_update_delete(client, user_token, admin_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    admin_task_id = client.post(
+        "/api/v1/tasks/", json={"title": "Admin Task"}, headers=admin_headers
+    ).json()["id"]
+    
+    response = client.post(
+        "/api/v1/tasks/bulk",
+        json={"items": [{"title": f"Bulk {i}"} for i in range(3)]},
+        headers=headers
+    )
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created"] * 3
+    assert [result["task"]["title"] for result in results] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    ids = [result["id"] for result in results]
+    
+    # Tasks owned by someone else are reported as not found, like get_task
+    response = client.patch(
+        "/api/v1/tasks/bulk",
+        json={"items": [
+            {"id": ids[0], "status": "completed"},
+            {"id": admin_task_id, "status": "completed"},
+        ]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["status"] == "updated"
+    assert results[0]["task"]["status"] == "completed"
+    assert results[0]["task"]["updated_at"] is not None
+    assert results[1]["status"] == "not_found"
+    
+    response = client.request(
+        "DELETE",
+        "/api/v1/tasks/bulk",
+        json={"ids": [ids[1], admin_task_id]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["deleted", "not_found"]
+    
+    remaining = client.get("/api/v1/tasks/", headers=headers).json()
+    assert sorted(task["id"] for task in remaining) == [ids[0], ids[2]]
+
+def test_export_tasks(client, user_token, admin_token):
+    import csv
+    import io
+    import json
+    
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": "One"}, {"title": "Two"}]}, headers=headers)
+    client.post(
+        "/api/v1/tasks/",
+        json={"title": "Admin only"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    
+    response = client.get("/api/v1/tasks/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["One", "Two"]
+    assert rows[0]["status"] == "pending"
+    
+    response = client.get(
+        "/api/v1/tasks/export?format=csv",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["One", "Two", "Admin only"]
+
+def test_filter_search_and_sort(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/api/v1/tasks/bulk", json={"items": [
+        {"title": "Write report", "description": "quarterly numbers", "status": "pending"},
+        {"title": "Review code", "description": "search indexes", "status": "completed"},
+        {"title": "Reporting pipeline", "status": "completed"},
+    ]}, headers=headers)
+    
+    response = client.get("/api/v1/tasks/?status=completed", headers=headers)
+    assert [task["title"] for task in response.json()] == ["Review code", "Reporting pipeline"]
+    
+    # Prefix search over title and description
+    response = client.get("/api/v1/tasks/?q=report", headers=headers)
+    assert [task["title"] for task in response.json()] == ["Write report", "Reporting pipeline"]
+    response = client.get("/api/v1/tasks/?q=indexes", headers=headers)
+    assert [task["title"] for task in response.json()] == ["Review code"]
+    
+    response = client.get("/api/v1/tasks/?sort=-title", headers=headers)
+    assert [task["title"] for task in response.json()] == [
+        "Write report", "Review code", "Reporting pipeline"
+    ]
+    
+    response = client.get("/api/v1/tasks/?pagination=cursor&sort=-id&limit=2", headers=headers)
+    page = response.json()
+    assert [task["title"] for task in page["items"]] == ["Reporting pipeline", "Review code"]
+    response = client.get(
+        f"/api/v1/tasks/?cursor={page['next_cursor']}&sort=-id&limit=2", headers=headers
+    )
+    assert [task["title"] for task in response.json()["items"]] == ["Write report"]
+    
+    response = client.get("/api/v1/tasks/?pagination=cursor&sort=title", headers=headers)
+    assert response.status_code == 400
+
+def test_task_stats_counters(client, user_token, admin_token):
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    created = client.post("/api/v1/tasks/bulk", json={"items": [
+        {"title": "One"}, {"title": "Two"}, {"title": "Three", "status": "completed"},
+    ]}, headers=user_headers).json()["results"]
+    client.post("/api/v1/tasks/", json={"title": "Admin task"}, headers=admin_headers)
+    
+    client.put(f"/api/v1/tasks/{created[0]['id']}", json={"status": "completed"}, headers=user_headers)
+    client.patch("/api/v1/tasks/bulk", json={"items": [
+        {"id": created[1]["id"], "status": "in_progress"}
+    ]}, headers=user_headers)
+    client.delete(f"/api/v1/tasks/{created[2]['id']}", headers=user_headers)
+    
+    stats = client.get("/api/v1/tasks/stats", headers=user_headers).json()
+    assert stats["total"] == 2
+    assert stats["counts"] == {"pending": 0, "in_progress": 1, "completed": 1, "cancelled": 0}
+    assert stats["completion_rate"] == 0.5
+    
+    stats = client.get("/api/v1/tasks/stats", headers=admin_headers).json()
+    assert stats["user_id"] is None
+    assert stats["total"] == 3
+    
+    user_id = created[0]["task"]["created_by"]
+    assert client.get(f"/api/v1/tasks/stats?user_id={user_id}", headers=admin_headers).json()["total"] == 2
+    response = client.get(f"/api/v1/tasks/stats?user_id={user_id + 1}", headers=user_headers)
+    assert response.status_code == 403
+    
+    # Rebuilding from the tasks table yields the same figures
+    from app.services.task_stats import task_stats
+    from tests.conftest import TestingSessionLocal
+    db = TestingSessionLocal()
+    try:
+        before = task_stats.get_stats(db)
+        task_stats.rebuild(db)
+        assert task_stats.get_stats(db) == before
+    finally:
+        db.close()
+
+def test_row_listing_matches_model_serialization():
+    adapter = TypeAdapter(List[TaskResponse])
+    naive = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    aware = datetime(2024, 5, 2, 8, 0, tzinfo=timezone.utc)
+    # Drivers return either naive (SQLite, MySQL) or aware (PostgreSQL) timestamps
+    for stamp in (naive, aware):
+        rows = [
+            ("Write", None, TaskStatus.PENDING, 1, 7, stamp, None),
+            ("Review", 'notes "quoted" \u00e9', TaskStatus.COMPLETED, 2, 7, stamp, stamp),
+        ]
+        expected = adapter.dump_json([TaskResponse(**dict(zip(TASK_FIELDS, row))) for row in rows])
+        assert listing_payload(rows, limit=100, cursor_mode=False).body == expected
+
+def test_task_writes_are_single_round_trips(client, user_token):
+    def measured(write):
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            task = write()
+            # Everything the response needs is loaded: no refresh after commit
+            TaskResponse.model_validate(task)
+        finally:
+            current_query_stats.reset(token)
+        return stats.count, task
+    
+    with TestingSessionLocal() as db:
+        # Detached, like the principal the routes receive
+        user = db.query(User).one()
+        db.expunge(user)
+        
+        # Version claim, INSERT ... RETURNING, then the status counter upsert
+        count, task = measured(lambda: task_service.create_task(db, TaskCreate(title="Draft"), user))
+        assert count == 3
+        assert task.created_at is not None
+        
+        # Version claim, then the ownership-checked UPDATE ... RETURNING
+        count, _ = measured(
+            lambda: task_service.update_task(db, task.id, TaskUpdate(title="Final"), user)
+        )
+        assert count == 2
+        # A status change also reads the replaced status (locked) and moves the counters
+        count, _ = measured(
+            lambda: task_service.update_task(db, task.id, TaskUpdate(status="completed"), user)
+        )
+        assert count == 4
+    
+    headers = {"Authorization": f"Bearer {user_token}"}
+    body = client.get(f"/api/v1/tasks/{task.id}", headers=headers).json()
+    assert (body["title"], body["status"]) == ("Final", "completed")
+    assert body["updated_at"] is not None
@@ -0,0 +1,68 @@
+import io
+import json
+import logging
+
+from app.core.config import settings
+from app.core.logging import CustomFormatter
+from app.core.tracing import RequestContextFilter, RequestTrace, current_trace
+from app.core.database import parameters_shape
+
+
+def test_request_id_and_server_timing(client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}", "X-Request-ID": "req-42"}
+    response = client.get("/api/v1/tasks/", headers=headers)
+    assert response.headers["X-Request-ID"] == "req-42"
+    timing = response.headers["Server-Timing"]
+    for name in ("auth", "service", "serialization", "db"):
+        assert f"{name};dur=" in timing
+    
+    # Malformed ids are replaced rather than echoed
+    response = client.get("/health", headers={"X-Request-ID": "bad id\r\n"})
+    assert response.headers["X-Request-ID"] != "bad id"
+    assert len(response.headers["X-Request-ID"]) == 32
+
+def test_access_log_carries_spans(client, user_token, caplog):
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get("/api/v1/tasks/", headers={"Authorization": f"Bearer {user_token}"})
+    record = [record for record in caplog.records if record.name == "app.access"][-1]
+    assert record.fields["route"] == "/api/v1/tasks/"
+    assert record.fields["status"] == 200
+    assert record.fields["db_queries"] >= 1
+    assert {"auth", "service"} <= set(record.fields["spans_ms"])
+
+def test_log_records_get_request_context():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(CustomFormatter())
+    handler.addFilter(RequestContextFilter())
+    logger = logging.getLogger("tests.tracing")
+    logger.addHandler(handler)
+    
+    trace = RequestTrace("abc")
+    trace.user_id = 7
+    token = current_trace.set(trace)
+    try:
+        logger.warning("inside", extra={"fields": {"task_id": 3}})
+    finally:
+        current_trace.reset(token)
+        logger.removeHandler(handler)
+    
+    entry = json.loads(stream.getvalue())
+    assert entry["request_id"] == "abc"
+    assert entry["user_id"] == 7
+    assert entry["task_id"] == 3
+
+def test_slow_query_log(client, user_token, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        client.post(
+            "/api/v1/tasks/", json={"title": "secret title"},
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+    records = [record for record in caplog.records if record.name == "app.db.slow_query"]
+    insert = next(record for record in records if record.fields["sql"].startswith("INSERT INTO tasks"))
+    assert "secret title" not in insert.fields["parameters"]
+    assert insert.fields["duration_ms"] >= 0
+    
+    assert parameters_shape({"b": 1, "a": 2}) == "{a, b}"
+    assert parameters_shape([(1, 2), (3, 4)], executemany=True) == "2 x (2 positional)"